@@ -0,0 +1,347 @@
+"""Benchmark y control de regresiones de plan de las consultas de graficas.py.
+
+Crea una BD aparte (MYSQL_BENCH_DB, por defecto dw_turismo_bench, nunca la de
+MYSQL_DB) copiando la estructura de las tablas del almacén (CREATE TABLE ... LIKE,
+con sus índices y particiones) y la llena de hechos sintéticos. Ejecuta cada
+consulta de graficas.CONSULTAS N veces y guarda en JSON:
+
+- latencias (min, media, p50, p90, p95, p99, max) en ms
+- EXPLAIN FORMAT=JSON resumido (full scans, filesort, temporales, particiones)
+  y el texto de EXPLAIN ANALYZE, de la consulta y de su SQL_ULTIMO_ANIO
+- lectura de todos los hechos con pd.read_sql frente a lectura.query_df
+
+Si existe una línea base, marca como regresión: tablas con full scan nuevas,
+filesort o tabla temporal que antes no estaban, más particiones leídas de
+hecho_turismo, o p50 por encima de `umbral` veces el de la base. También es
+regresión que lectura.query_df sea más lenta que pd.read_sql (con el mismo
+umbral y margen). Una línea base medida con otra configuración no se compara:
+el programa termina con código 2.
+
+Uso:
+    py -m analiticas.benchmark --escala 5 --repeticiones 30
+    py -m analiticas.benchmark --guardar-baseline
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analiticas import lectura
+from analiticas.graficas import CONSULTAS, SQL_ULTIMO_ANIO
+from etl.carga import asegurar_particiones
+from etl.db import get_conn, clonar_esquema
+from etl.utils import FUENTES, month_name_es, first_day_of_month
+
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+BENCH_DIR = BASE_DIR / "analytics" / "bench"
+BASELINE_FILE = BENCH_DIR / "baseline.json"
+RESULTADOS_FILE = BENCH_DIR / "resultados.json"
+
+BENCH_DB = os.getenv("MYSQL_BENCH_DB", "dw_turismo_bench")
+ANIO_INICIO = 2015
+LOTE = 5000
+
+# Miembros por dimensión con escala 1 (más un miembro "Total" en cada una)
+MIEMBROS_BASE = {"pais": 40, "comunidad": 19, "motivo": 6, "duracion": 6}
+
+
+def sembrar(escala, anios, semilla=42):
+    """Recrea la BD de benchmark con el esquema del almacén y hechos sintéticos. Devuelve el nº de hechos."""
+    rng = np.random.default_rng(semilla)
+    years = list(range(ANIO_INICIO, ANIO_INICIO + anios))
+    clonar_esquema(BENCH_DB)
+    conn = get_conn(database=BENCH_DB)
+    try:
+        # Igual que una carga: los años que no tengan partición salen de pmax
+        asegurar_particiones(conn, years)
+        cur = conn.cursor()
+        cur.execute("SET SESSION sql_mode = 'NO_AUTO_VALUE_ON_ZERO'")
+
+        cur.executemany(
+            "INSERT INTO dim_tiempo (anio, mes, trimestre, descripcion_mes, fecha_inicio_mes) VALUES (%s,%s,%s,%s,%s)",
+            [(a, m, (m - 1) // 3 + 1, month_name_es(m), first_day_of_month(a, m)) for a in years for m in range(1, 13)],
+        )
+        cur.execute("SELECT anio, mes, id_tiempo FROM dim_tiempo")
+        ids_tiempo = {(a, m): i for a, m, i in cur.fetchall()}
+
+        ids_miembros = {}
+        for fuente, (id_col, tabla, nombre_col) in FUENTES.items():
+            cur.execute(f"INSERT INTO {tabla} ({id_col}, {nombre_col}) VALUES (0, 'No aplica')")
+            nombres = [f"Total {fuente}"] + [f"{fuente} {i:05d}" for i in range(MIEMBROS_BASE[fuente] * escala)]
+            cur.executemany(f"INSERT INTO {tabla} ({nombre_col}) VALUES (%s)", [(n,) for n in nombres])
+            cur.execute(f"SELECT {id_col} FROM {tabla} WHERE {id_col} != 0 ORDER BY {id_col}")
+            ids_miembros[fuente] = [i for (i,) in cur.fetchall()]
+        conn.commit()
+
+        sql = (
+            "INSERT INTO hecho_turismo (id_tiempo, anio, id_pais, id_comunidad, id_motivo, id_duracion, "
+            "numero_turistas, variacion_anual, acumulado, variacion_acumulada) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)"
+        )
+        total = 0
+        for posicion, fuente in enumerate(FUENTES):
+            # Comunidades: dato anual (mes 12), como en etl_comunidad
+            meses = [12] if fuente == "comunidad" else range(1, 13)
+            filas = []
+            for a in years:
+                for m in meses:
+                    for id_miembro in ids_miembros[fuente]:
+                        ids = [0, 0, 0, 0]
+                        ids[posicion] = id_miembro
+                        turistas = int(rng.integers(100, 500000))
+                        filas.append((ids_tiempo[(a, m)], a, *ids, turistas,
+                                      round(float(rng.normal(3, 10)), 2),
+                                      turistas * m, round(float(rng.normal(3, 10)), 2)))
+            for i in range(0, len(filas), LOTE):
+                cur.executemany(sql, filas[i:i + LOTE])
+                conn.commit()
+            total += len(filas)
+
+        cur.executemany("INSERT INTO etl_carga (fuente, version, ultimo_anio) VALUES (%s, 1, %s)",
+                        [(fuente, years[-1]) for fuente in FUENTES])
+        conn.commit()
+
+        cur.execute("ANALYZE TABLE dim_tiempo, dim_pais, dim_comunidad, dim_motivo, dim_duracion, hecho_turismo")
+        cur.fetchall()
+        cur.close()
+        return total
+    finally:
+        conn.close()
+
+def _recorrer(nodo, resumen):
+    if isinstance(nodo, dict):
+        if nodo.get("using_filesort"):
+            resumen["filesort"] = True
+        if nodo.get("using_temporary_table"):
+            resumen["temporal"] = True
+        if "table_name" in nodo and "access_type" in nodo:
+            tabla = nodo["table_name"]
+            if nodo["access_type"] == "ALL":
+                resumen["full_scans"].append(tabla)
+            if "partitions" in nodo:
+                resumen["particiones"][tabla] = nodo["partitions"]
+        for v in nodo.values():
+            _recorrer(v, resumen)
+    elif isinstance(nodo, list):
+        for v in nodo:
+            _recorrer(v, resumen)
+
+def resumir_plan(plan_json):
+    resumen = {"full_scans": [], "filesort": False, "temporal": False, "particiones": {}}
+    _recorrer(json.loads(plan_json), resumen)
+    resumen["full_scans"] = sorted(set(resumen["full_scans"]))
+    return resumen
+
+def explicar(cur, sql, params):
+    cur.execute("EXPLAIN FORMAT=JSON " + sql, params)
+    plan = cur.fetchone()[0]
+    try:
+        cur.execute("EXPLAIN ANALYZE " + sql, params)
+        analyze = "\n".join(str(fila[0]) for fila in cur.fetchall())
+    except Exception as e:
+        # EXPLAIN ANALYZE solo existe desde MySQL 8.0.18
+        analyze = f"no disponible: {e}"
+    return resumir_plan(plan), analyze
+
+def percentiles(tiempos_ms):
+    t = np.array(tiempos_ms)
+    return {
+        "min": float(t.min()),
+        "media": float(t.mean()),
+        "p50": float(np.percentile(t, 50)),
+        "p90": float(np.percentile(t, 90)),
+        "p95": float(np.percentile(t, 95)),
+        "p99": float(np.percentile(t, 99)),
+        "max": float(t.max()),
+    }
+
+def medir(repeticiones, calentamiento=2):
+    conn = get_conn(database=BENCH_DB)
+    resultados = {}
+    try:
+        cur = conn.cursor(buffered=True)
+        for nombre, (sql, fuente) in CONSULTAS.items():
+            def ejecutar():
+                params = None
+                if fuente is not None:
+                    # El informe paga también la búsqueda del último año
+                    cur.execute(SQL_ULTIMO_ANIO, (fuente,))
+                    params = (cur.fetchone()[0],)
+                cur.execute(sql, params)
+                cur.fetchall()
+                return params
+
+            for _ in range(calentamiento):
+                ejecutar()
+            tiempos = []
+            for _ in range(repeticiones):
+                t0 = time.perf_counter()
+                params = ejecutar()
+                tiempos.append((time.perf_counter() - t0) * 1000)
+
+            plan, analyze = explicar(cur, sql, params)
+            resultados[nombre] = {
+                "latencia_ms": percentiles(tiempos),
+                "plan": plan,
+                "explain_analyze": analyze,
+            }
+            if fuente is not None:
+                plan, analyze = explicar(cur, SQL_ULTIMO_ANIO, (fuente,))
+                resultados[nombre]["plan_ultimo_anio"] = plan
+                resultados[nombre]["explain_analyze_ultimo_anio"] = analyze
+            print(f"{nombre:<22} p50={resultados[nombre]['latencia_ms']['p50']:8.2f} ms  "
+                  f"p95={resultados[nombre]['latencia_ms']['p95']:8.2f} ms")
+        cur.close()
+    finally:
+        conn.close()
+    return resultados
+
+# Consulta ancha (todos los hechos) para comparar la lectura a pandas
+SQL_LECTURA = """
+    SELECT h.anio, t.mes, h.id_pais, h.id_comunidad, h.id_motivo, h.id_duracion,
+           h.numero_turistas, h.variacion_anual, h.acumulado, h.variacion_acumulada
+    FROM hecho_turismo h
+    JOIN dim_tiempo t ON h.id_tiempo = t.id_tiempo
+    """
+
+def medir_lectura(repeticiones):
+    """p50 de pd.read_sql frente a lectura.query_df sobre SQL_LECTURA (con conexión incluida)."""
+    def read_sql():
+        conn = get_conn(database=BENCH_DB)
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                return pd.read_sql(SQL_LECTURA, conn)
+        finally:
+            conn.close()
+
+    def query_df():
+        return lectura.query_df(SQL_LECTURA, database=BENCH_DB)
+
+    resultado = {}
+    for nombre, fn in (("read_sql", read_sql), ("lectura", query_df)):
+        filas = len(fn())  # calentamiento
+        tiempos = []
+        for _ in range(repeticiones):
+            t0 = time.perf_counter()
+            fn()
+            tiempos.append((time.perf_counter() - t0) * 1000)
+        resultado[nombre] = percentiles(tiempos)
+    resultado["filas"] = filas
+    resultado["aceleracion_p50"] = resultado["read_sql"]["p50"] / resultado["lectura"]["p50"]
+    print(f"{'lectura vs read_sql':<22} {filas} filas: read_sql p50={resultado['read_sql']['p50']:.1f} ms, "
+          f"lectura p50={resultado['lectura']['p50']:.1f} ms (x{resultado['aceleracion_p50']:.2f})")
+    return resultado
+
+def comparar_plan(nombre, plan, plan_base):
+    regresiones = []
+    nuevas = sorted(set(plan["full_scans"]) - set(plan_base["full_scans"]))
+    if nuevas:
+        regresiones.append(f"{nombre}: full scan nuevo en {', '.join(nuevas)}")
+    if plan["filesort"] and not plan_base["filesort"]:
+        regresiones.append(f"{nombre}: aparece filesort")
+    if plan["temporal"] and not plan_base["temporal"]:
+        regresiones.append(f"{nombre}: aparece tabla temporal")
+    for tabla, parts in plan["particiones"].items():
+        antes = plan_base["particiones"].get(tabla)
+        if antes is not None and len(parts) > len(antes):
+            regresiones.append(f"{nombre}: {tabla} lee {len(parts)} particiones (antes {len(antes)})")
+    return regresiones
+
+def comparar(actual, base, umbral, margen_ms):
+    """Lista de regresiones de `actual` frente a `base` (resultados de medir())."""
+    regresiones = []
+    for nombre, r in actual.items():
+        b = base.get(nombre)
+        if b is None:
+            continue
+        regresiones += comparar_plan(nombre, r["plan"], b["plan"])
+        if "plan_ultimo_anio" in r and "plan_ultimo_anio" in b:
+            regresiones += comparar_plan(f"{nombre} (último año)", r["plan_ultimo_anio"], b["plan_ultimo_anio"])
+
+        p50, p50_base = r["latencia_ms"]["p50"], b["latencia_ms"]["p50"]
+        if p50 > p50_base * umbral and p50 - p50_base > margen_ms:
+            regresiones.append(f"{nombre}: p50 {p50:.2f} ms frente a {p50_base:.2f} ms en la base (x{p50 / p50_base:.2f})")
+    return regresiones
+
+def comparar_lectura(lectura_df, umbral, margen_ms):
+    """Regresión si lectura.query_df es más lenta que pd.read_sql, con el mismo margen que comparar()."""
+    p50, p50_read_sql = lectura_df["lectura"]["p50"], lectura_df["read_sql"]["p50"]
+    if p50 > p50_read_sql * umbral and p50 - p50_read_sql > margen_ms:
+        return [f"lectura.query_df: p50 {p50:.2f} ms frente a {p50_read_sql:.2f} ms de pd.read_sql "
+                f"(x{lectura_df['aceleracion_p50']:.2f})"]
+    return []
+
+def guardar_json(path, datos):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(datos, indent=2, ensure_ascii=False), encoding="utf-8")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las consultas de graficas.py con control de regresiones.")
+    parser.add_argument("--escala", type=int, default=1, help="Multiplica el nº de miembros de cada dimensión.")
+    parser.add_argument("--anios", type=int, default=10, help="Años de hechos sintéticos.")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--sin-sembrar", action="store_true", help="Reutiliza la BD de benchmark ya sembrada.")
+    parser.add_argument("--umbral", type=float, default=1.5, help="Regresión si p50 > umbral * p50 de la base.")
+    parser.add_argument("--margen-ms", type=float, default=1.0, help="Diferencia mínima de p50 para contar como regresión.")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--salida", type=Path, default=RESULTADOS_FILE)
+    parser.add_argument("--guardar-baseline", action="store_true", help="Guarda estos resultados como nueva línea base.")
+    args = parser.parse_args()
+
+    if BENCH_DB == os.getenv("MYSQL_DB", "dw_turismo"):
+        sys.exit(f"MYSQL_BENCH_DB ({BENCH_DB}) no puede ser la BD del almacén: sembrar() la borra.")
+
+    config = {"escala": args.escala, "anios": args.anios, "repeticiones": args.repeticiones}
+    base = None
+    if args.baseline.exists() and not args.guardar_baseline:
+        base = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if base.get("config") != config:
+            # Con otra escala u otros años las latencias y los planes no son comparables
+            print(f"ERROR: la línea base se midió con {base.get('config')} y ahora es {config}. "
+                  "Repite con la misma configuración o usa --guardar-baseline.")
+            sys.exit(2)
+
+    if not args.sin_sembrar:
+        t0 = time.perf_counter()
+        hechos = sembrar(args.escala, args.anios)
+        print(f"BD {BENCH_DB} sembrada: {hechos} hechos en {time.perf_counter() - t0:.1f}s")
+
+    consultas = medir(args.repeticiones)
+    lectura_df = medir_lectura(args.repeticiones)
+
+    regresiones = comparar_lectura(lectura_df, args.umbral, args.margen_ms)
+    if base is not None:
+        regresiones += comparar(consultas, base["consultas"], args.umbral, args.margen_ms)
+    elif not args.guardar_baseline:
+        print(f"Sin línea base en {args.baseline}: usar --guardar-baseline para crearla.")
+
+    resultados = {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": config,
+        "consultas": consultas,
+        "lectura": lectura_df,
+        "regresiones": regresiones,
+    }
+    guardar_json(args.salida, resultados)
+    print("Resultados:", args.salida)
+    if args.guardar_baseline:
+        guardar_json(args.baseline, resultados)
+        print("Línea base guardada:", args.baseline)
+
+    if regresiones:
+        print("REGRESIONES:")
+        for r in regresiones:
+            print(" -", r)
+        sys.exit(1)
+    print("OK: sin regresiones.")
+
+if __name__ == "__main__":
+    main()
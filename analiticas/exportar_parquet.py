@@ -0,0 +1,187 @@
+"""Exportación de hecho_turismo (con sus dimensiones) a Parquet particionado.
+
+Estructura de salida (estilo Hive, se lee con pd.read_parquet sobre una fuente):
+
+    analytics/parquet/fuente=pais/anio=2024/part-0.parquet
+    analytics/parquet/manifest.json
+
+Solo se vuelven a exportar las particiones (fuente, año) cuya huella en MySQL
+ha cambiado desde la última exportación.
+"""
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from etl.db import get_conn
+from etl.utils import FUENTES
+
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+OUT_DIR = BASE_DIR / "analytics" / "parquet"
+MANIFEST_FILE = OUT_DIR / "manifest.json"
+
+CHUNK_SIZE = 5000
+METRICAS = ["numero_turistas", "variacion_anual", "acumulado", "variacion_acumulada"]
+
+
+def esquema(fuente):
+    # anio no se guarda dentro del fichero: va en la ruta de la partición
+    id_col, _, nombre_col = FUENTES[fuente]
+    campos = [
+        ("id_tiempo", pa.int32()),
+        ("mes", pa.int8()),
+        ("trimestre", pa.int8()),
+        (id_col, pa.int32()),
+        (nombre_col, pa.string()),
+    ]
+    campos += [(m, pa.float64()) for m in METRICAS]
+    return pa.schema(campos)
+
+def huellas_origen(conn, fuente):
+    """Filas y checksum por año de una fuente, calculados en el servidor."""
+    id_col, tabla, nombre_col = FUENTES[fuente]
+    campos = ", ".join(f"IFNULL(h.{m}, 'N')" for m in METRICAS)
+    sql = f"""
+    SELECT h.anio, COUNT(*),
+           COALESCE(SUM(CRC32(CONCAT_WS('|', h.id_tiempo, h.{id_col}, d.{nombre_col}, {campos}))), 0)
+    FROM hecho_turismo h
+    JOIN {tabla} d ON h.{id_col} = d.{id_col}
+    WHERE h.{id_col} != 0
+    GROUP BY h.anio
+    """
+    cur = conn.cursor()
+    cur.execute(sql)
+    out = {int(anio): (int(filas), str(int(suma))) for anio, filas, suma in cur.fetchall()}
+    cur.close()
+    return out
+
+def ruta_particion(fuente, anio):
+    return OUT_DIR / f"fuente={fuente}" / f"anio={anio}" / "part-0.parquet"
+
+def sha256_fichero(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+def exportar_particion(conn, fuente, anio, destino):
+    """Vuelca una partición leyendo el resultado por lotes (fetchmany) sin cargarlo entero."""
+    id_col, tabla, nombre_col = FUENTES[fuente]
+    metricas = ", ".join(f"CAST(h.{m} AS DOUBLE)" for m in METRICAS)
+    sql = f"""
+    SELECT h.id_tiempo, t.mes, t.trimestre, h.{id_col}, d.{nombre_col}, {metricas}
+    FROM hecho_turismo h
+    JOIN dim_tiempo t ON h.id_tiempo = t.id_tiempo
+    JOIN {tabla} d ON h.{id_col} = d.{id_col}
+    WHERE h.{id_col} != 0 AND h.anio = %s
+    ORDER BY t.mes, h.{id_col}
+    """
+    schema = esquema(fuente)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    tmp = destino.with_name(destino.name + ".tmp")
+
+    # Cursor sin buffer: las filas se van leyendo del servidor según se piden
+    cur = conn.cursor(buffered=False)
+    filas = 0
+    try:
+        cur.execute(sql, (anio,))
+        with pq.ParquetWriter(tmp, schema) as writer:
+            while True:
+                lote = cur.fetchmany(CHUNK_SIZE)
+                if not lote:
+                    break
+                columnas = [pa.array(col, type=campo.type) for col, campo in zip(zip(*lote), schema)]
+                writer.write_batch(pa.record_batch(columnas, schema=schema))
+                filas += len(lote)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    finally:
+        # Si falla a mitad quedan filas sin leer: sin esto close() lanzaría
+        # "Unread result found" y taparía el error real
+        if conn.unread_result:
+            conn.consume_results()
+        cur.close()
+
+    os.replace(tmp, destino)
+    return filas
+
+def load_manifest():
+    if MANIFEST_FILE.exists():
+        return json.loads(MANIFEST_FILE.read_text(encoding="utf-8"))
+    return {"particiones": {}}
+
+def save_manifest(manifest):
+    manifest["generado"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    tmp = MANIFEST_FILE.with_name(MANIFEST_FILE.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, MANIFEST_FILE)
+
+def exportar(fuentes=None, todo=False):
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest()
+    particiones = manifest["particiones"]
+    exportadas = omitidas = 0
+
+    conn = get_conn()
+    try:
+        for fuente in fuentes or FUENTES:
+            origen = huellas_origen(conn, fuente)
+            # Cerrar la transacción de lectura libera el bloqueo de metadatos de
+            # hecho_turismo: si no, las DDL de las cargas (REORGANIZE / EXCHANGE
+            # PARTITION) esperarían a que terminase toda la exportación.
+            conn.commit()
+
+            for anio, (filas_origen, huella) in sorted(origen.items()):
+                clave = f"{fuente}/{anio}"
+                destino = ruta_particion(fuente, anio)
+                previa = particiones.get(clave)
+                if (not todo and previa and previa["huella_origen"] == huella
+                        and destino.exists() and sha256_fichero(destino) == previa["sha256"]):
+                    omitidas += 1
+                    continue
+
+                filas = exportar_particion(conn, fuente, anio, destino)
+                conn.commit()
+                particiones[clave] = {
+                    "fuente": fuente,
+                    "anio": anio,
+                    "ruta": destino.relative_to(OUT_DIR).as_posix(),
+                    "filas": filas,
+                    "huella_origen": huella,
+                    "sha256": sha256_fichero(destino),
+                }
+                save_manifest(manifest)
+                exportadas += 1
+                if filas != filas_origen:
+                    print(f"AVISO: {clave} ha cambiado durante la exportación ({filas_origen} -> {filas} filas)")
+                print("OK parquet:", destino, f"({filas} filas)")
+
+            # Años que ya no existen en el almacén
+            for clave in [c for c, p in particiones.items() if p["fuente"] == fuente and p["anio"] not in origen]:
+                ruta = OUT_DIR / particiones.pop(clave)["ruta"]
+                ruta.unlink(missing_ok=True)
+                save_manifest(manifest)
+                print("Eliminada partición:", clave)
+    finally:
+        conn.close()
+
+    print(f"Exportación terminada: {exportadas} particiones escritas, {omitidas} sin cambios.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta hecho_turismo a Parquet particionado por fuente y año.")
+    parser.add_argument("--fuente", choices=list(FUENTES), action="append",
+                        help="Fuente a exportar (se puede repetir). Por defecto, todas.")
+    parser.add_argument("--todo", action="store_true", help="Re-exporta todas las particiones aunque no hayan cambiado.")
+    args = parser.parse_args()
+    exportar(args.fuente, args.todo)
+
+if __name__ == "__main__":
+    main()
@@ -2,27 +2,14 @@ from pathlib import Path
 import pandas as pd
 import matplotlib.pyplot as plt
 
-from etl.db import get_conn
+from analiticas import lectura
 
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 OUT_DIR = BASE_DIR / "analytics" / "out"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-def query_df(sql: str, params=None) -> pd.DataFrame:
-    conn = get_conn()
-    try:
-       
-        import warnings
-        with warnings.catch_warnings():
-            warnings.simplefilter('ignore')
-            return pd.read_sql(sql, conn, params=params)
-    finally:
-        conn.close()
-
-def grafica_top_paises_historicos():
-    """1. Top 10 países emisores históricos (Gráfico de barras)"""
-    sql = """
+SQL_TOP_PAISES = """
     SELECT p.nombre_pais, SUM(h.numero_turistas) AS total_turistas
     FROM hecho_turismo h
     JOIN dim_pais p ON h.id_pais = p.id_pais
@@ -31,7 +18,93 @@ def grafica_top_paises_historicos():
     ORDER BY total_turistas DESC
     LIMIT 10;
     """
-    df = query_df(sql)
+
+SQL_RANKING_COMUNIDADES = """
+    SELECT c.nombre_comunidad, SUM(h.numero_turistas) AS total_turistas
+    FROM hecho_turismo h
+    JOIN dim_comunidad c ON h.id_comunidad = c.id_comunidad
+    WHERE h.id_comunidad != 0 AND c.nombre_comunidad NOT LIKE '%Total%'
+      -- Filtramos por el último año disponible de las comunidades
+      AND h.anio = %s
+    GROUP BY c.nombre_comunidad
+    ORDER BY total_turistas DESC
+    LIMIT 5;
+    """
+
+SQL_CRECIMIENTO_REGIONAL = """
+    SELECT c.nombre_comunidad, AVG(h.variacion_anual) AS crecimiento
+    FROM hecho_turismo h
+    JOIN dim_comunidad c ON h.id_comunidad = c.id_comunidad
+    WHERE h.id_comunidad != 0 AND c.nombre_comunidad NOT LIKE '%Total%'
+      AND h.anio = %s
+    GROUP BY c.nombre_comunidad
+    ORDER BY crecimiento DESC
+    LIMIT 5;
+    """
+
+SQL_MOTIVOS_VIAJE = """
+    SELECT m.nombre_motivo, SUM(h.numero_turistas) AS total_turistas
+    FROM hecho_turismo h
+    JOIN dim_motivo m ON h.id_motivo = m.id_motivo
+    WHERE h.id_motivo != 0 AND m.nombre_motivo NOT LIKE '%Total%'
+      AND h.anio = %s
+    GROUP BY m.nombre_motivo
+    ORDER BY total_turistas DESC;
+    """
+
+SQL_DURACION_ESTANCIA = """
+    SELECT d.descripcion_duracion, SUM(h.numero_turistas) AS total_turistas
+    FROM hecho_turismo h
+    JOIN dim_duracion d ON h.id_duracion = d.id_duracion
+    WHERE h.id_duracion != 0 AND d.descripcion_duracion NOT LIKE '%Total%'
+    GROUP BY d.descripcion_duracion
+    ORDER BY total_turistas ASC; -- Ascendente para que la barra mayor quede arriba
+    """
+
+SQL_ESTACIONALIDAD = """
+    SELECT t.mes, SUM(h.numero_turistas) AS total_turistas
+    FROM hecho_turismo h
+    JOIN dim_tiempo t ON h.id_tiempo = t.id_tiempo
+    JOIN dim_pais p ON h.id_pais = p.id_pais
+    -- Para no duplicar datos (como país y motivo tienen info mensual cruzada con total de turistas),
+    -- tomamos la tabla de países como referencia de la base general para sacar el mes.
+    WHERE h.id_pais != 0 AND p.nombre_pais NOT LIKE '%Total%'
+    GROUP BY t.mes
+    ORDER BY t.mes;
+    """
+
+# Lo anota cada carga (etl/db.py): no hace falta recorrer hecho_turismo
+SQL_ULTIMO_ANIO = "SELECT ultimo_anio AS anio FROM etl_carga WHERE fuente = %s"
+
+# Consultas de cada gráfica: nombre -> (sql, fuente cuyo último año se pasa como
+# parámetro, o None si no lleva parámetros). La usa también benchmark.py.
+CONSULTAS = {
+    "top_paises": (SQL_TOP_PAISES, None),
+    "ranking_comunidades": (SQL_RANKING_COMUNIDADES, "comunidad"),
+    "crecimiento_regional": (SQL_CRECIMIENTO_REGIONAL, "comunidad"),
+    "motivos_viaje": (SQL_MOTIVOS_VIAJE, "motivo"),
+    "duracion_estancia": (SQL_DURACION_ESTANCIA, None),
+    "estacionalidad": (SQL_ESTACIONALIDAD, None),
+}
+
+def query_df(sql: str, params=None) -> pd.DataFrame:
+    # Lectura por lotes con columnas ya tipadas (ver analiticas/lectura.py)
+    return lectura.query_df(sql, params)
+
+def ultimo_anio(fuente: str):
+    """Último año con datos de una fuente (p. ej. "comunidad"), según etl_carga.
+
+    Se obtiene antes que la consulta principal para filtrar con h.anio = %s: con un
+    valor constante MySQL solo lee la partición de ese año de hecho_turismo.
+    """
+    df = query_df(SQL_ULTIMO_ANIO, (fuente,))
+    if df.empty or pd.isna(df["anio"].iloc[0]):
+        return None
+    return int(df["anio"].iloc[0])
+
+def grafica_top_paises_historicos():
+    """1. Top 10 países emisores históricos (Gráfico de barras)"""
+    df = query_df(SQL_TOP_PAISES)
     if df.empty: return
 
     ax = df.plot(kind="bar", x="nombre_pais", y="total_turistas", legend=False, color="#4C72B0")
@@ -48,23 +121,9 @@ def grafica_top_paises_historicos():
 
 def grafica_ranking_comunidades():
     """2. Ranking de las 5 comunidades más visitadas en el último año (Quesito/Tarta)"""
-    sql = """
-    SELECT c.nombre_comunidad, SUM(h.numero_turistas) AS total_turistas
-    FROM hecho_turismo h
-    JOIN dim_comunidad c ON h.id_comunidad = c.id_comunidad
-    JOIN dim_tiempo t ON h.id_tiempo = t.id_tiempo
-    WHERE h.id_comunidad != 0 AND c.nombre_comunidad NOT LIKE '%Total%'
-      -- Filtramos por el último año disponible de las comunidades
-      AND t.anio = (
-          SELECT MAX(t2.anio) FROM hecho_turismo h2 
-          JOIN dim_tiempo t2 ON h2.id_tiempo = t2.id_tiempo 
-          WHERE h2.id_comunidad != 0
-      )
-    GROUP BY c.nombre_comunidad
-    ORDER BY total_turistas DESC
-    LIMIT 5;
-    """
-    df = query_df(sql)
+    anio = ultimo_anio("comunidad")
+    if anio is None: return
+    df = query_df(SQL_RANKING_COMUNIDADES, (anio,))
     if df.empty: return
 
     plt.figure(figsize=(8, 8))
@@ -79,22 +138,9 @@ def grafica_ranking_comunidades():
 
 def grafica_crecimiento_regional():
     """3. Comunidades que más han crecido en el último año (Gráfico de barras)"""
-    sql = """
-    SELECT c.nombre_comunidad, AVG(h.variacion_anual) AS crecimiento
-    FROM hecho_turismo h
-    JOIN dim_comunidad c ON h.id_comunidad = c.id_comunidad
-    JOIN dim_tiempo t ON h.id_tiempo = t.id_tiempo
-    WHERE h.id_comunidad != 0 AND c.nombre_comunidad NOT LIKE '%Total%'
-      AND t.anio = (
-          SELECT MAX(t2.anio) FROM hecho_turismo h2 
-          JOIN dim_tiempo t2 ON h2.id_tiempo = t2.id_tiempo 
-          WHERE h2.id_comunidad != 0
-      )
-    GROUP BY c.nombre_comunidad
-    ORDER BY crecimiento DESC
-    LIMIT 5;
-    """
-    df = query_df(sql)
+    anio = ultimo_anio("comunidad")
+    if anio is None: return
+    df = query_df(SQL_CRECIMIENTO_REGIONAL, (anio,))
     if df.empty: return
 
     ax = df.plot(kind="bar", x="nombre_comunidad", y="crecimiento", legend=False, color="#55A868")
@@ -111,21 +157,9 @@ def grafica_crecimiento_regional():
 
 def grafica_motivos_viaje():
     """4. Distribución de motivos de viaje en el último año (Gráfico de Tarta)"""
-    sql = """
-    SELECT m.nombre_motivo, SUM(h.numero_turistas) AS total_turistas
-    FROM hecho_turismo h
-    JOIN dim_motivo m ON h.id_motivo = m.id_motivo
-    JOIN dim_tiempo t ON h.id_tiempo = t.id_tiempo
-    WHERE h.id_motivo != 0 AND m.nombre_motivo NOT LIKE '%Total%'
-      AND t.anio = (
-          SELECT MAX(t2.anio) FROM hecho_turismo h2 
-          JOIN dim_tiempo t2 ON h2.id_tiempo = t2.id_tiempo 
-          WHERE h2.id_motivo != 0
-      )
-    GROUP BY m.nombre_motivo
-    ORDER BY total_turistas DESC;
-    """
-    df = query_df(sql)
+    anio = ultimo_anio("motivo")
+    if anio is None: return
+    df = query_df(SQL_MOTIVOS_VIAJE, (anio,))
     if df.empty: return
 
     plt.figure(figsize=(8, 8))
@@ -142,15 +176,7 @@ def grafica_motivos_viaje():
 
 def grafica_duracion_estancia():
     """5. Duración preferida de los turistas a nivel global (Gráfico de barras horizontales)"""
-    sql = """
-    SELECT d.descripcion_duracion, SUM(h.numero_turistas) AS total_turistas
-    FROM hecho_turismo h
-    JOIN dim_duracion d ON h.id_duracion = d.id_duracion
-    WHERE h.id_duracion != 0 AND d.descripcion_duracion NOT LIKE '%Total%'
-    GROUP BY d.descripcion_duracion
-    ORDER BY total_turistas ASC; -- Ascendente para que la barra mayor quede arriba
-    """
-    df = query_df(sql)
+    df = query_df(SQL_DURACION_ESTANCIA)
     if df.empty: return
 
     ax = df.plot(kind="barh", x="descripcion_duracion", y="total_turistas", legend=False, color="#C44E52")
@@ -166,18 +192,7 @@ def grafica_duracion_estancia():
 
 def grafica_estacionalidad_meses():
     """6. Estacionalidad: Suma de turistas por meses para ver los picos (Gráfico de barras)"""
-    sql = """
-    SELECT t.mes, SUM(h.numero_turistas) AS total_turistas
-    FROM hecho_turismo h
-    JOIN dim_tiempo t ON h.id_tiempo = t.id_tiempo
-    JOIN dim_pais p ON h.id_pais = p.id_pais
-    -- Para no duplicar datos (como país y motivo tienen info mensual cruzada con total de turistas),
-    -- tomamos la tabla de países como referencia de la base general para sacar el mes.
-    WHERE h.id_pais != 0 AND p.nombre_pais NOT LIKE '%Total%'
-    GROUP BY t.mes
-    ORDER BY t.mes;
-    """
-    df = query_df(sql)
+    df = query_df(SQL_ESTACIONALIDAD)
     if df.empty: return
 
     meses_nombres = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
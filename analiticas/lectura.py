@@ -0,0 +1,130 @@
+"""Lectura de resultados de MySQL a pandas por lotes y con columnas tipadas.
+
+En lugar de pd.read_sql (que crea una tupla de objetos Python por fila y luego
+infiere tipos), se usa un cursor sin buffer en modo raw: cada lote llega como
+bytes y se decodifica columna a columna directamente a arrays de NumPy según
+el tipo que declara MySQL. Las columnas numéricas se unen en un único buffer que
+NumPy convierte en C, sin crear un objeto Python por valor.
+"""
+import numpy as np
+import pandas as pd
+from mysql.connector import FieldType
+
+from etl.db import get_conn
+
+
+CHUNK_SIZE = 10000
+
+_ENTEROS = {
+    FieldType.TINY, FieldType.SHORT, FieldType.INT24,
+    FieldType.LONG, FieldType.LONGLONG, FieldType.YEAR,
+}
+_REALES = {FieldType.DECIMAL, FieldType.NEWDECIMAL, FieldType.FLOAT, FieldType.DOUBLE}
+_FECHAS = {FieldType.DATE, FieldType.DATETIME, FieldType.TIMESTAMP, FieldType.NEWDATE}
+
+# Cómo se combinan los parciales de cada lote en query_agg
+_COMBINAR = {"sum": "sum", "count": "sum", "min": "min", "max": "max"}
+
+
+def _parse_numeros(valores, dtype, nulo):
+    """Convierte la columna en C a partir de un único buffer "v1 v2 ...".
+
+    Vale igual para bytes que para bytearray (según devuelva el cursor raw).
+    Devuelve (array, máscara de NULL o None si no hay ninguno).
+    """
+    try:
+        buffer, nulos = b" ".join(valores), None
+    except TypeError:
+        # None no se puede unir: la columna tiene NULLs
+        nulos = np.fromiter((v is None for v in valores), dtype=bool, count=len(valores))
+        buffer = b" ".join([nulo if v is None else v for v in valores])
+    return np.fromstring(buffer, dtype=dtype, count=len(valores), sep=" "), nulos
+
+def _decode_columna(valores, type_code):
+    if type_code in _ENTEROS:
+        datos, nulos = _parse_numeros(valores, np.int64, b"0")
+        if nulos is not None:
+            return pd.arrays.IntegerArray(datos, nulos)
+        return datos
+    if type_code in _REALES:
+        return _parse_numeros(valores, np.float64, b"nan")[0]
+
+    texto = [None if v is None else v.decode("utf-8") for v in valores]
+    if type_code in _FECHAS:
+        return pd.to_datetime(pd.Series(texto), errors="coerce").to_numpy()
+    return pd.array(texto, dtype="string")
+
+def _chunk_df(filas, description):
+    columnas = list(zip(*filas))
+    return pd.DataFrame({
+        desc[0]: _decode_columna(col, desc[1]) for desc, col in zip(description, columnas)
+    })
+
+def iter_chunks(sql: str, params=None, chunk_size: int = CHUNK_SIZE, database=None, conn=None):
+    """Genera DataFrames tipados de como mucho chunk_size filas.
+
+    Si la consulta no devuelve filas se genera un único DataFrame vacío con sus columnas.
+    Con `conn` se usa esa conexión (p. ej. para leer varias consultas en la misma
+    transacción) y no se cierra al terminar.
+    """
+    propia = conn is None
+    if propia:
+        conn = get_conn(database)
+    try:
+        cur = conn.cursor(raw=True)
+        try:
+            cur.execute(sql, params)
+            vacio = True
+            while True:
+                filas = cur.fetchmany(chunk_size)
+                if not filas:
+                    break
+                vacio = False
+                yield _chunk_df(filas, cur.description)
+            if vacio:
+                yield pd.DataFrame(columns=[d[0] for d in cur.description])
+        finally:
+            # Si se deja de iterar antes de tiempo quedan filas sin leer en el cursor sin buffer
+            if conn.unread_result:
+                conn.consume_results()
+            cur.close()
+    finally:
+        if propia:
+            conn.close()
+
+def query_df(sql: str, params=None, chunk_size: int = CHUNK_SIZE, database=None, conn=None) -> pd.DataFrame:
+    partes = list(iter_chunks(sql, params, chunk_size, database, conn))
+    if len(partes) == 1:
+        return partes[0]
+    return pd.concat(partes, ignore_index=True)
+
+def query_agg(sql: str, by, aggs: dict, params=None, chunk_size: int = CHUNK_SIZE, database=None) -> pd.DataFrame:
+    """Agrega el resultado lote a lote (memoria acotada por el nº de grupos, no de filas).
+
+    aggs: {columna: "sum" | "count" | "min" | "max" | "mean"}
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    parcial = {}
+    for col, func in aggs.items():
+        if func == "mean":
+            parcial[f"{col}__sum"] = (col, "sum")
+            parcial[f"{col}__count"] = (col, "count")
+        elif func in _COMBINAR:
+            parcial[col] = (col, func)
+        else:
+            raise ValueError(f"Agregación no soportada: {func}")
+    combinar = {nombre: _COMBINAR[func] for nombre, (_, func) in parcial.items()}
+
+    acumulado = None
+    # iter_chunks siempre genera al menos un lote
+    for chunk in iter_chunks(sql, params, chunk_size, database):
+        parte = chunk.groupby(by, dropna=False).agg(**parcial)
+        if acumulado is None:
+            acumulado = parte
+        else:
+            acumulado = pd.concat([acumulado, parte]).groupby(level=by, dropna=False).agg(combinar)
+
+    for col, func in aggs.items():
+        if func == "mean":
+            acumulado[col] = acumulado.pop(f"{col}__sum") / acumulado.pop(f"{col}__count")
+    return acumulado[list(aggs)].reset_index()
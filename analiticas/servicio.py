@@ -0,0 +1,331 @@
+"""Servicio analítico en memoria sobre el modelo en estrella.
+
+Carga hecho_turismo una sola vez (por fuente) en arrays de NumPy con códigos
+enteros para la dimensión y responde consultas de slice/dice/rollup por HTTP:
+
+    GET /estado
+    GET /consulta?fuente=pais&por=anio,miembro&anio=ultimo&top=10
+    GET /graficas/<nombre>          (las seis agregaciones de graficas.py)
+
+Cada `intervalo` segundos mira la tabla etl_carga y recarga solo las fuentes
+cuya versión haya cambiado.
+
+Uso:
+    py -m analiticas.servicio --port 8765
+"""
+import argparse
+import json
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from analiticas import lectura
+from etl.db import get_conn
+from etl.utils import FUENTES, normalize_text
+
+
+MEDIDAS = ["numero_turistas", "variacion_anual", "acumulado", "variacion_acumulada"]
+AGREGACIONES = ["sum", "mean", "count", "min", "max"]
+DIMENSIONES = ["anio", "mes", "miembro"]
+
+# Las seis agregaciones de analiticas/graficas.py expresadas sobre el cubo
+GRAFICAS = {
+    "top_paises": dict(fuente="pais", por=["miembro"], top=10),
+    "ranking_comunidades": dict(fuente="comunidad", por=["miembro"], anio="ultimo", top=5),
+    "crecimiento_regional": dict(fuente="comunidad", por=["miembro"], medida="variacion_anual",
+                                 agg="mean", anio="ultimo", top=5),
+    "motivos_viaje": dict(fuente="motivo", por=["miembro"], anio="ultimo"),
+    "duracion_estancia": dict(fuente="duracion", por=["miembro"], orden="asc"),
+    "estacionalidad": dict(fuente="pais", por=["mes"], orden="clave"),
+}
+
+
+class Cubo:
+    """Hechos de una fuente: una fila por hecho, columnas como arrays de NumPy."""
+
+    def __init__(self, fuente, version, anio, mes, codigo, medidas, nombres):
+        self.fuente = fuente
+        self.version = version
+        self.anio = anio            # int16
+        self.mes = mes              # int8 (0 si no hay mes)
+        self.codigo = codigo        # int32, índice en self.nombres
+        self.medidas = medidas      # {medida: float64 con NaN para NULL}
+        self.nombres = nombres      # nombres de los miembros de la dimensión
+        # Como NOT LIKE '%Total%' con la collation _ai_ci de MySQL: sin mayúsculas ni acentos
+        self.es_total = np.array(["total" in normalize_text(n) for n in nombres], dtype=bool)
+        self.anio_min = int(anio.min()) if len(anio) else 0
+        self.anio_max = int(anio.max()) if len(anio) else 0
+
+    def __len__(self):
+        return len(self.anio)
+
+
+def codificar(ids, id_miembro, tabla):
+    """Posición de cada id_miembro en `ids` (ordenados); error si alguno no está."""
+    codigo = np.searchsorted(ids, id_miembro)
+    validos = codigo < len(ids)
+    validos[validos] = ids[codigo[validos]] == id_miembro[validos]
+    if not validos.all():
+        huerfanos = np.unique(id_miembro[~validos])
+        raise RuntimeError(f"Hay hechos con miembros que no están en {tabla}: {huerfanos[:10].tolist()}")
+    return codigo.astype(np.int32)
+
+def cargar_cubo(fuente, version):
+    id_col, tabla, nombre_col = FUENTES[fuente]
+
+    sql = f"""
+    SELECT h.anio, t.mes, h.{id_col} AS id_miembro, {", ".join(f"h.{m}" for m in MEDIDAS)}
+    FROM hecho_turismo h
+    JOIN dim_tiempo t ON h.id_tiempo = t.id_tiempo
+    WHERE h.{id_col} != 0
+    """
+    anios, meses, codigos = [], [], []
+    medidas = {m: [] for m in MEDIDAS}
+
+    # Dimensión y hechos en la misma instantánea: un miembro que añada una carga
+    # entre las dos lecturas no puede aparecer en los hechos sin estar en `ids`.
+    conn = get_conn()
+    try:
+        conn.start_transaction(consistent_snapshot=True, isolation_level="REPEATABLE READ", readonly=True)
+        dim = lectura.query_df(f"SELECT {id_col}, {nombre_col} FROM {tabla} WHERE {id_col} != 0 ORDER BY {id_col}",
+                               conn=conn)
+        ids = dim[id_col].to_numpy(dtype=np.int64)
+        nombres = [str(n) for n in dim[nombre_col]]
+
+        for chunk in lectura.iter_chunks(sql, conn=conn):
+            anios.append(chunk["anio"].to_numpy(dtype=np.int16))
+            meses.append(chunk["mes"].to_numpy(dtype=np.int8, na_value=0))
+            codigos.append(codificar(ids, chunk["id_miembro"].to_numpy(dtype=np.int64), tabla))
+            for m in MEDIDAS:
+                medidas[m].append(chunk[m].to_numpy(dtype=np.float64, na_value=np.nan))
+        conn.commit()
+    finally:
+        conn.close()
+
+    return Cubo(
+        fuente, version,
+        np.concatenate(anios), np.concatenate(meses), np.concatenate(codigos),
+        {m: np.concatenate(v) for m, v in medidas.items()},
+        nombres,
+    )
+
+def consultar(cubo, por=("miembro",), medida="numero_turistas", agg="sum", anio=None, mes=None,
+              miembros=None, totales=False, top=None, orden="desc"):
+    """Agrupa el cubo por las dimensiones de `por` y devuelve (columnas, filas)."""
+    por = list(por)
+    if medida not in MEDIDAS:
+        raise ValueError(f"Medida desconocida: {medida}")
+    if agg not in AGREGACIONES:
+        raise ValueError(f"Agregación desconocida: {agg}")
+    if orden not in ("desc", "asc", "clave"):
+        raise ValueError(f"Orden desconocido: {orden}")
+    for d in por:
+        if d not in DIMENSIONES:
+            raise ValueError(f"Dimensión desconocida: {d}")
+
+    # Slice / dice
+    mask = np.ones(len(cubo), dtype=bool)
+    if not totales:
+        mask &= ~cubo.es_total[cubo.codigo]
+    if anio is not None:
+        # "ultimo" igual que en graficas.py: último año con datos de la fuente
+        mask &= cubo.anio == (cubo.anio_max if anio == "ultimo" else int(anio))
+    if mes is not None:
+        mask &= cubo.mes == int(mes)
+    if miembros:
+        miembros = set(miembros)
+        codigos = [i for i, n in enumerate(cubo.nombres) if n in miembros]
+        mask &= np.isin(cubo.codigo, codigos)
+
+    # Rollup: una clave plana por grupo y bincount
+    claves, tamanos = [], []
+    for d in por:
+        if d == "anio":
+            claves.append(cubo.anio[mask].astype(np.int64) - cubo.anio_min)
+            tamanos.append(cubo.anio_max - cubo.anio_min + 1)
+        elif d == "mes":
+            claves.append(cubo.mes[mask].astype(np.int64))
+            tamanos.append(13)
+        else:
+            claves.append(cubo.codigo[mask].astype(np.int64))
+            tamanos.append(max(len(cubo.nombres), 1))
+    n = int(np.prod(tamanos)) if por else 1
+    plana = np.ravel_multi_index(claves, tamanos) if por else np.zeros(int(mask.sum()), dtype=np.int64)
+
+    valores = cubo.medidas[medida][mask]
+    validos = ~np.isnan(valores)
+    presentes = np.bincount(plana, minlength=n) > 0
+    cuenta = np.bincount(plana[validos], minlength=n)
+
+    if agg in ("sum", "mean"):
+        resultado = np.bincount(plana[validos], weights=valores[validos], minlength=n)
+        if agg == "mean":
+            resultado = np.divide(resultado, cuenta, out=np.zeros(n), where=cuenta > 0)
+    elif agg == "count":
+        resultado = cuenta.astype(np.float64)
+    else:
+        resultado = np.full(n, np.inf if agg == "min" else -np.inf)
+        (np.minimum if agg == "min" else np.maximum).at(resultado, plana[validos], valores[validos])
+    # Como en SQL: grupos sin ningún valor no nulo dan NULL (salvo COUNT)
+    nulos = (cuenta == 0) & (agg != "count")
+
+    grupos = np.flatnonzero(presentes)  # ya vienen ordenados por clave
+    if orden != "clave":
+        v = resultado[grupos] if orden == "asc" else -resultado[grupos]
+        grupos = grupos[np.lexsort((v, nulos[grupos]))]
+    if top is not None:
+        grupos = grupos[:int(top)]
+
+    partes = np.unravel_index(grupos, tamanos) if por else []
+    columnas = [FUENTES[cubo.fuente][2] if d == "miembro" else d for d in por] + [medida]
+    filas = []
+    for i, g in enumerate(grupos):
+        fila = []
+        for d, parte in zip(por, partes):
+            k = int(parte[i])
+            fila.append(k + cubo.anio_min if d == "anio" else cubo.nombres[k] if d == "miembro" else k)
+        fila.append(None if nulos[g] else float(resultado[g]))
+        filas.append(fila)
+    return columnas, filas
+
+
+class Servicio:
+    def __init__(self):
+        self.cubos = {}
+        self._lock = threading.Lock()
+
+    def versiones(self):
+        conn = get_conn()
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT fuente, version FROM etl_carga")
+            leidas = dict(cur.fetchall())
+            cur.close()
+        finally:
+            conn.close()
+        return {f: int(leidas.get(f, 0)) for f in FUENTES}
+
+    def refrescar(self):
+        """Recarga las fuentes cuya versión de carga ha cambiado."""
+        with self._lock:
+            # La versión se lee antes que los datos: si llega otra carga mientras
+            # tanto, en la siguiente vuelta se vuelve a recargar.
+            for fuente, version in self.versiones().items():
+                actual = self.cubos.get(fuente)
+                if actual is not None and actual.version == version:
+                    continue
+                t0 = time.perf_counter()
+                # Sustituir la referencia es atómico: las consultas en curso siguen con el cubo anterior
+                self.cubos[fuente] = cargar_cubo(fuente, version)
+                print(f"Cargada fuente {fuente} v{version}: {len(self.cubos[fuente])} hechos "
+                      f"en {time.perf_counter() - t0:.2f}s")
+
+    def refrescar_periodicamente(self, intervalo):
+        while True:
+            time.sleep(intervalo)
+            try:
+                self.refrescar()
+            except Exception as e:
+                print("Error refrescando:", e)
+
+    def consultar(self, fuente, **kwargs):
+        if fuente not in FUENTES:
+            raise ValueError(f"Fuente desconocida: {fuente}")
+        cubo = self.cubos[fuente]
+        t0 = time.perf_counter()
+        columnas, filas = consultar(cubo, **kwargs)
+        return {
+            "fuente": fuente,
+            "version": cubo.version,
+            "columnas": columnas,
+            "filas": filas,
+            "ms": round((time.perf_counter() - t0) * 1000, 3),
+        }
+
+    def estado(self):
+        return {
+            f: {"version": c.version, "hechos": len(c), "anios": [c.anio_min, c.anio_max]}
+            for f, c in self.cubos.items()
+        }
+
+
+def _parametros(qs):
+    p = {k: v[-1] for k, v in parse_qs(qs).items()}
+    kwargs = {}
+    if "por" in p:
+        kwargs["por"] = [d for d in p["por"].split(",") if d]
+    for clave in ("medida", "agg", "anio", "mes", "orden"):
+        if clave in p:
+            kwargs[clave] = p[clave]
+    if "top" in p:
+        kwargs["top"] = int(p["top"])
+    if "miembro" in p:
+        kwargs["miembros"] = parse_qs(qs)["miembro"]
+    if "totales" in p:
+        kwargs["totales"] = p["totales"] in ("1", "true", "si")
+    return p.get("fuente", "pais"), kwargs
+
+def crear_handler(servicio):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            try:
+                if url.path == "/estado":
+                    self._json(200, servicio.estado())
+                elif url.path == "/consulta":
+                    fuente, kwargs = _parametros(url.query)
+                    self._json(200, servicio.consultar(fuente, **kwargs))
+                elif url.path.startswith("/graficas/"):
+                    nombre = url.path[len("/graficas/"):]
+                    if nombre not in GRAFICAS:
+                        self._json(404, {"error": f"Gráfica desconocida: {nombre}", "graficas": list(GRAFICAS)})
+                        return
+                    kwargs = dict(GRAFICAS[nombre])
+                    self._json(200, servicio.consultar(kwargs.pop("fuente"), **kwargs))
+                else:
+                    self._json(404, {"error": "Ruta desconocida"})
+            except ValueError as e:
+                self._json(400, {"error": str(e)})
+            except Exception as e:
+                traceback.print_exc()
+                self._json(500, {"error": f"Error interno: {e.__class__.__name__}"})
+
+        def _json(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio analítico en memoria sobre hecho_turismo.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--intervalo", type=float, default=30, help="Segundos entre comprobaciones de etl_carga.")
+    args = parser.parse_args()
+
+    servicio = Servicio()
+    servicio.refrescar()
+    threading.Thread(target=servicio.refrescar_periodicamente, args=(args.intervalo,), daemon=True).start()
+
+    server = ThreadingHTTPServer((args.host, args.port), crear_handler(servicio))
+    print(f"Servicio analítico escuchando en http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
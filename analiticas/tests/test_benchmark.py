@@ -0,0 +1,84 @@
+import json
+
+from analiticas import benchmark
+
+
+# Forma de EXPLAIN FORMAT=JSON de MySQL 8 (recortada)
+PLAN = {
+    "query_block": {
+        "select_id": 1,
+        "ordering_operation": {
+            "using_filesort": True,
+            "grouping_operation": {
+                "using_temporary_table": True,
+                "nested_loop": [
+                    {"table": {"table_name": "h", "access_type": "ref", "partitions": ["p2024"]}},
+                    {"table": {"table_name": "c", "access_type": "ALL"}},
+                    {"table": {"table_name": "c", "access_type": "ALL"}},
+                ],
+            },
+        },
+    }
+}
+
+
+def plan(full_scans=(), filesort=False, temporal=False, particiones=None):
+    return {"full_scans": list(full_scans), "filesort": filesort, "temporal": temporal,
+            "particiones": particiones or {}}
+
+def resultado(p50, **kwargs):
+    return {"latencia_ms": {"p50": p50}, "plan": plan(**kwargs)}
+
+
+def test_resumir_plan():
+    assert benchmark.resumir_plan(json.dumps(PLAN)) == {
+        "full_scans": ["c"],
+        "filesort": True,
+        "temporal": True,
+        "particiones": {"h": ["p2024"]},
+    }
+
+def test_resumir_plan_sin_problemas():
+    simple = {"query_block": {"table": {"table_name": "etl_carga", "access_type": "const"}}}
+    assert benchmark.resumir_plan(json.dumps(simple)) == plan()
+
+def test_comparar_sin_cambios():
+    base = {"q": resultado(10.0, particiones={"h": ["p2024"]})}
+    actual = {"q": resultado(11.0, particiones={"h": ["p2024"]})}
+    assert benchmark.comparar(actual, base, umbral=1.5, margen_ms=1.0) == []
+
+def test_comparar_detecta_cambios_de_plan():
+    base = {"q": resultado(10.0, particiones={"h": ["p2024"]})}
+    actual = {"q": resultado(10.0, full_scans=["h"], filesort=True, temporal=True,
+                             particiones={"h": ["p2023", "p2024"]})}
+    regresiones = benchmark.comparar(actual, base, umbral=1.5, margen_ms=1.0)
+    assert len(regresiones) == 4
+    assert any("full scan nuevo en h" in r for r in regresiones)
+    assert any("2 particiones (antes 1)" in r for r in regresiones)
+
+def test_comparar_latencia_con_umbral_y_margen():
+    base = {"q": resultado(1.0), "r": resultado(10.0)}
+    # x3 pero solo 2 ms más: por debajo del margen; x2 y 10 ms más: regresión
+    actual = {"q": resultado(3.0), "r": resultado(20.0)}
+    regresiones = benchmark.comparar(actual, base, umbral=1.5, margen_ms=5.0)
+    assert len(regresiones) == 1 and regresiones[0].startswith("r: p50")
+
+def test_comparar_plan_del_ultimo_anio():
+    base = {"q": {**resultado(10.0), "plan_ultimo_anio": plan()}}
+    actual = {"q": {**resultado(10.0), "plan_ultimo_anio": plan(full_scans=["hecho_turismo"])}}
+    assert benchmark.comparar(actual, base, umbral=1.5, margen_ms=1.0) == [
+        "q (último año): full scan nuevo en hecho_turismo"
+    ]
+
+def test_comparar_ignora_consultas_nuevas():
+    assert benchmark.comparar({"nueva": resultado(50.0, full_scans=["h"])}, {}, umbral=1.5, margen_ms=1.0) == []
+
+def test_comparar_lectura_con_umbral_y_margen():
+    def lectura(p50_read_sql, p50):
+        return {"read_sql": {"p50": p50_read_sql}, "lectura": {"p50": p50}, "aceleracion_p50": p50_read_sql / p50}
+
+    assert benchmark.comparar_lectura(lectura(100.0, 50.0), umbral=1.5, margen_ms=1.0) == []
+    # Algo más lenta por ruido: no es regresión
+    assert benchmark.comparar_lectura(lectura(100.0, 120.0), umbral=1.5, margen_ms=1.0) == []
+    assert benchmark.comparar_lectura(lectura(1.0, 1.8), umbral=1.5, margen_ms=1.0) == []
+    assert len(benchmark.comparar_lectura(lectura(100.0, 200.0), umbral=1.5, margen_ms=1.0)) == 1
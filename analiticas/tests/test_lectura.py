@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from mysql.connector import FieldType
+
+from analiticas import lectura
+
+
+@pytest.mark.parametrize("tipo", [bytes, bytearray])
+def test_decode_enteros_y_reales(tipo):
+    enteros = lectura._decode_columna((tipo(b"2024"), tipo(b"-3"), tipo(b"0")), FieldType.LONG)
+    assert enteros.dtype == np.int64
+    assert enteros.tolist() == [2024, -3, 0]
+
+    reales = lectura._decode_columna((tipo(b"1.25"), None, tipo(b"-0.50")), FieldType.NEWDECIMAL)
+    assert reales.dtype == np.float64
+    assert reales[0] == 1.25 and np.isnan(reales[1]) and reales[2] == -0.5
+
+def test_decode_enteros_con_nulos():
+    columna = lectura._decode_columna((b"7", None, b"9"), FieldType.LONGLONG)
+    assert str(columna.dtype) == "Int64"
+    assert columna.isna().tolist() == [False, True, False]
+    assert columna[2] == 9
+
+def test_decode_texto_y_fechas():
+    texto = lectura._decode_columna((bytearray("Cataluña".encode()), None), FieldType.VAR_STRING)
+    assert texto[0] == "Cataluña" and pd.isna(texto[1])
+
+    fechas = lectura._decode_columna((b"2024-03-01", None), FieldType.DATE)
+    assert fechas[0] == np.datetime64("2024-03-01") and np.isnat(fechas[1])
+
+def test_chunk_df():
+    description = [("anio", FieldType.SHORT), ("nombre", FieldType.VAR_STRING), ("turistas", FieldType.NEWDECIMAL)]
+    df = lectura._chunk_df([(b"2023", b"Madrid", b"10.5"), (b"2024", b"Murcia", None)], description)
+    assert list(df.columns) == ["anio", "nombre", "turistas"]
+    assert df["anio"].tolist() == [2023, 2024]
+    assert df["turistas"].isna().tolist() == [False, True]
+
+def test_query_agg_combina_los_lotes(monkeypatch):
+    lotes = [
+        pd.DataFrame({"mes": [1, 1, 2], "turistas": [10.0, 20.0, np.nan]}),
+        pd.DataFrame({"mes": [1, 2, np.nan], "turistas": [30.0, 5.0, 1.0]}),
+    ]
+    monkeypatch.setattr(lectura, "iter_chunks", lambda *args, **kwargs: iter(lotes))
+
+    df = lectura.query_agg("SELECT ...", "mes", {"turistas": "mean"})
+    por_mes = dict(zip(df["mes"].fillna(0), df["turistas"]))
+    # La media se recalcula con las sumas y cuentas de todos los lotes, no con medias parciales
+    assert por_mes == {1: 20.0, 2: 5.0, 0: 1.0}
+
+    df = lectura.query_agg("SELECT ...", ["mes"], {"turistas": "count"})
+    assert dict(zip(df["mes"].fillna(0), df["turistas"])) == {1: 3, 2: 1, 0: 1}
+
+    with pytest.raises(ValueError):
+        lectura.query_agg("SELECT ...", "mes", {"turistas": "median"})
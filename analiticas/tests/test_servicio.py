@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from analiticas.servicio import Cubo, codificar, consultar
+
+
+def cubo(filas, nombres, fuente="pais"):
+    """filas: [(anio, mes, codigo, numero_turistas)] con None para NULL."""
+    anio, mes, codigo, valor = zip(*filas)
+    turistas = np.array([np.nan if v is None else v for v in valor], dtype=np.float64)
+    medidas = {
+        "numero_turistas": turistas,
+        "variacion_anual": turistas / 10,
+        "acumulado": turistas,
+        "variacion_acumulada": turistas / 10,
+    }
+    return Cubo(fuente, 1, np.array(anio, dtype=np.int16), np.array(mes, dtype=np.int8),
+                np.array(codigo, dtype=np.int32), medidas, nombres)
+
+
+NOMBRES = ["Francia", "Alemania", "TOTAL PAÍSES", "Italia"]
+FILAS = [
+    (2023, 1, 0, 10.0), (2023, 2, 0, 20.0),
+    (2023, 1, 1, 50.0), (2024, 1, 1, 5.0),
+    (2023, 1, 2, 1000.0),
+    (2023, 1, 3, None), (2024, 2, 3, None),
+]
+
+
+def test_suma_por_miembro_ordenada_y_sin_totales():
+    columnas, filas = consultar(cubo(FILAS, NOMBRES))
+    assert columnas == ["nombre_pais", "numero_turistas"]
+    # Italia solo tiene NULL: su SUM es NULL y va al final, como en MySQL con DESC
+    assert filas == [["Alemania", 55.0], ["Francia", 30.0], ["Italia", None]]
+
+def test_totales_sin_distinguir_mayusculas_ni_acentos():
+    _, filas = consultar(cubo(FILAS, NOMBRES), totales=True, top=1)
+    assert filas == [["TOTAL PAÍSES", 1000.0]]
+
+def test_orden_ascendente_deja_los_nulos_al_final():
+    _, filas = consultar(cubo(FILAS, NOMBRES), orden="asc")
+    assert [f[0] for f in filas] == ["Francia", "Alemania", "Italia"]
+
+def test_top_y_ultimo_anio():
+    _, filas = consultar(cubo(FILAS, NOMBRES), anio="ultimo", top=1)
+    assert filas == [["Alemania", 5.0]]
+
+def test_count_no_cuenta_nulos():
+    _, filas = consultar(cubo(FILAS, NOMBRES), agg="count", orden="clave")
+    assert filas == [["Francia", 2.0], ["Alemania", 2.0], ["Italia", 0.0]]
+
+def test_media_y_agrupacion_por_anio_y_mes():
+    _, filas = consultar(cubo(FILAS, NOMBRES), por=["anio", "mes"], agg="mean", orden="clave")
+    assert filas == [[2023, 1, 30.0], [2023, 2, 20.0], [2024, 1, 5.0], [2024, 2, None]]
+
+def test_filtro_por_miembro():
+    _, filas = consultar(cubo(FILAS, NOMBRES), por=["mes"], miembros=["Francia"], orden="clave")
+    assert filas == [[1, 10.0], [2, 20.0]]
+
+def test_parametros_invalidos():
+    c = cubo(FILAS, NOMBRES)
+    with pytest.raises(ValueError):
+        consultar(c, medida="turistas")
+    with pytest.raises(ValueError):
+        consultar(c, por=["trimestre"])
+
+def test_codificar_rechaza_miembros_fuera_de_la_dimension():
+    ids = np.array([1, 3, 5])
+    assert codificar(ids, np.array([5, 1, 3]), "dim_pais").tolist() == [2, 0, 1]
+    # Un id en medio del rango no se asigna al vecino, y uno mayor no da len(ids)
+    for id_miembro in (4, 9):
+        with pytest.raises(RuntimeError, match="dim_pais"):
+            codificar(ids, np.array([1, id_miembro]), "dim_pais")
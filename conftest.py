@@ -0,0 +1,2 @@
+# etl/test_db.py es un script que se conecta a MySQL al importarse, no un test
+collect_ignore = ["etl/test_db.py"]
@@ -0,0 +1,281 @@
+"""Carga de hecho_turismo común a los cuatro ETL, preparada para ejecutarlos a la vez.
+
+- Las dimensiones se siembran antes que los hechos en una única transacción
+  corta: solo se insertan los miembros que faltan y siempre en el mismo orden
+  (registros 'No aplica', dim_tiempo por (anio, mes) y la dimensión propia).
+- Los hechos se escriben por lotes ordenados por clave, un lote por transacción.
+- Las transacciones abortadas por deadlock o lock wait timeout se reintentan.
+
+hecho_turismo está particionada por año (sql/03_particiones.sql). Con `anio`,
+cargar() recarga ese año entero en una tabla sombra y la intercambia con la
+partición (EXCHANGE PARTITION), así la sustitución es atómica para los lectores.
+Hay un bloqueo con nombre (GET_LOCK) por (año, fuente): las cargas normales solo
+toman el de su fuente, así que las cuatro pueden escribir el mismo año a la vez;
+una recarga toma los cuatro del año, siempre en el orden de FUENTES.
+Las DDL de particiones esperan el bloqueo de metadatos poco tiempo
+(ESPERA_DDL) y se reintentan, en vez de quedarse colgadas detrás de un lector largo.
+"""
+import argparse
+import time
+from itertools import groupby
+
+import mysql.connector
+from mysql.connector import errorcode
+import pandas as pd
+
+from etl.db import get_conn, registrar_carga, con_reintentos
+from etl.utils import FUENTES, month_name_es, first_day_of_month
+
+LOTE = 500
+ESPERA_BLOQUEO = 300  # segundos esperando el bloqueo de un (año, fuente)
+ESPERA_DDL = 5  # lock_wait_timeout (s) de las DDL de particiones
+INTENTOS_DDL = 6
+METRICAS = ["numero_turistas", "variacion_anual", "acumulado", "variacion_acumulada"]
+
+SQL_HECHO = (
+    "INSERT INTO {tabla} (id_tiempo, anio, id_pais, id_comunidad, id_motivo, id_duracion, numero_turistas, variacion_anual, acumulado, variacion_acumulada) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE "
+    "numero_turistas=VALUES(numero_turistas), variacion_anual=VALUES(variacion_anual), acumulado=VALUES(acumulado), variacion_acumulada=VALUES(variacion_acumulada)"
+)
+
+
+def preparar_sesion(cur):
+    # NO_AUTO_VALUE_ON_ZERO: para poder insertar los registros con id = 0.
+    # READ COMMITTED: las lecturas ven lo que otras cargas ya han confirmado y
+    # InnoDB no toma gap locks en las búsquedas, que es lo que provoca los deadlocks.
+    cur.execute("SET SESSION sql_mode = 'NO_AUTO_VALUE_ON_ZERO';")
+    cur.execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED;")
+
+def ensure_dummy_records(cur):
+    # Mismo orden de tablas en todas las cargas
+    for id_col, tabla, nombre_col in FUENTES.values():
+        cur.execute(f"SELECT 1 FROM {tabla} WHERE {id_col} = 0")
+        if cur.fetchone() is None:
+            cur.execute(
+                f"INSERT INTO {tabla} ({id_col}, {nombre_col}) VALUES (0, 'No aplica') "
+                f"ON DUPLICATE KEY UPDATE {id_col} = {id_col}"
+            )
+
+def _ids_tiempo(cur, anio_min, anio_max):
+    cur.execute("SELECT anio, mes, id_tiempo FROM dim_tiempo WHERE anio BETWEEN %s AND %s", (anio_min, anio_max))
+    return {(anio, mes): id_tiempo for anio, mes, id_tiempo in cur.fetchall()}
+
+def sembrar_tiempo(cur, periodos):
+    """periodos: [(anio, mes, trimestre)] -> {(anio, mes): id_tiempo}"""
+    periodos = sorted(set(periodos))
+    anio_min, anio_max = periodos[0][0], periodos[-1][0]
+    ids = _ids_tiempo(cur, anio_min, anio_max)
+    nuevos = [(a, m, t, month_name_es(m), first_day_of_month(a, m)) for a, m, t in periodos if (a, m) not in ids]
+    if nuevos:
+        cur.executemany(
+            "INSERT INTO dim_tiempo (anio, mes, trimestre, descripcion_mes, fecha_inicio_mes) VALUES (%s,%s,%s,%s,%s) "
+            "ON DUPLICATE KEY UPDATE descripcion_mes=VALUES(descripcion_mes)", nuevos
+        )
+        ids = _ids_tiempo(cur, anio_min, anio_max)
+    return ids
+
+def sembrar_miembros(cur, fuente, nombres):
+    """Inserta los miembros que falten en la dimensión de la fuente -> {nombre: id}"""
+    id_col, tabla, nombre_col = FUENTES[fuente]
+    sql_ids = f"SELECT {nombre_col}, {id_col} FROM {tabla} WHERE {id_col} != 0"
+    cur.execute(sql_ids)
+    ids = dict(cur.fetchall())
+    nuevos = [(n,) for n in sorted(set(nombres)) if n not in ids]
+    if nuevos:
+        cur.executemany(
+            f"INSERT INTO {tabla} ({nombre_col}) VALUES (%s) "
+            f"ON DUPLICATE KEY UPDATE {nombre_col}=VALUES({nombre_col})", nuevos
+        )
+        cur.execute(sql_ids)
+        ids = dict(cur.fetchall())
+    return ids
+
+def sembrar_dimensiones(cur, fuente, df):
+    ensure_dummy_records(cur)
+    periodos = [(int(a), int(m), int(t)) for a, m, t in zip(df["anio"], df["mes"], df["trimestre"])]
+    ids_tiempo = sembrar_tiempo(cur, periodos)
+    ids_miembro = sembrar_miembros(cur, fuente, [str(n) for n in df[fuente]])
+    return ids_tiempo, ids_miembro
+
+def _valor(row, col):
+    v = row.get(col)
+    return v if pd.notna(v) else None
+
+def filas_hechos(fuente, df, ids_tiempo, ids_miembro):
+    """Tuplas para SQL_HECHO ordenadas por (anio, id_tiempo, id_pais, ..., id_duracion)."""
+    posicion = list(FUENTES).index(fuente)
+    filas = []
+    for _, r in df.iterrows():
+        ids = [0, 0, 0, 0]
+        ids[posicion] = ids_miembro[str(r[fuente])]
+        anio = int(r["anio"])
+        id_tiempo = ids_tiempo[(anio, int(r["mes"]))]
+        filas.append((id_tiempo, anio, *ids, *(_valor(r, m) for m in METRICAS)))
+    filas.sort(key=lambda f: (f[1], f[0], *f[2:6]))
+    return filas
+
+def insertar_hechos(cur, filas, tabla="hecho_turismo"):
+    cur.executemany(SQL_HECHO.format(tabla=tabla), filas)
+
+def particiones(cur):
+    """{nombre: límite superior (None para MAXVALUE)} de hecho_turismo; vacío si no está particionada."""
+    cur.execute(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'hecho_turismo' AND PARTITION_NAME IS NOT NULL"
+    )
+    return {nombre: None if desc == "MAXVALUE" else int(desc) for nombre, desc in cur.fetchall()}
+
+def _reorganizar(cur, particion, anios, antes=(), despues=()):
+    """Parte `particion` en p<año> para `anios`, con lo que quede de ella antes o después."""
+    definicion = [*antes, *(f"PARTITION p{a} VALUES LESS THAN ({a + 1})" for a in anios), *despues]
+    try:
+        ddl_particion(cur, f"ALTER TABLE hecho_turismo REORGANIZE PARTITION {particion} INTO ({', '.join(definicion)})")
+    except mysql.connector.Error:
+        # Otra carga la ha reorganizado a la vez: basta con que ya existan
+        if not all(f"p{a}" in particiones(cur) for a in anios):
+            raise
+
+def asegurar_particiones(conn, anios):
+    """Crea una partición p<año> por cada año que no la tenga (de forma contigua).
+
+    Los años posteriores salen de pmax y los anteriores de pantiguo.
+    """
+    cur = conn.cursor(buffered=True)
+    try:
+        actuales = particiones(cur)
+        if "pmax" not in actuales:
+            return
+        # Primer y último año con partición propia
+        limites = [v for k, v in actuales.items() if v is not None and k != "pantiguo"]
+        if limites:
+            primero, ultimo = min(limites) - 1, max(limites) - 1
+        else:
+            primero = actuales.get("pantiguo", min(anios))
+            ultimo = primero - 1
+
+        nuevos = range(ultimo + 1, max(anios) + 1)
+        if nuevos:
+            _reorganizar(cur, "pmax", nuevos, despues=["PARTITION pmax VALUES LESS THAN MAXVALUE"])
+        antiguos = range(min(anios), primero)
+        if antiguos and "pantiguo" in actuales:
+            _reorganizar(cur, "pantiguo", antiguos, antes=[f"PARTITION pantiguo VALUES LESS THAN ({antiguos[0]})"])
+    finally:
+        cur.close()
+
+def ddl_particion(cur, sql):
+    """Ejecuta una DDL de particiones sin esperar un año al bloqueo de metadatos.
+
+    Si una consulta o transacción larga tiene abierta hecho_turismo, la DDL
+    falla a los ESPERA_DDL segundos y se reintenta con espera creciente.
+    """
+    cur.execute("SET SESSION lock_wait_timeout = %s", (ESPERA_DDL,))
+    try:
+        for intento in range(1, INTENTOS_DDL + 1):
+            try:
+                cur.execute(sql)
+                return
+            except mysql.connector.Error as e:
+                if e.errno != errorcode.ER_LOCK_WAIT_TIMEOUT:
+                    raise
+                if intento == INTENTOS_DDL:
+                    raise RuntimeError(
+                        "hecho_turismo sigue en uso tras varios intentos (bloqueo de metadatos). "
+                        "Revisa SHOW PROCESSLIST: alguna lectura larga (p. ej. exportar_parquet) "
+                        "o una transacción sin cerrar la tiene abierta."
+                    ) from e
+                print(f"Reintento DDL {intento}/{INTENTOS_DDL - 1}: hecho_turismo en uso")
+                time.sleep(ESPERA_DDL * intento)
+    finally:
+        cur.execute("SET SESSION lock_wait_timeout = DEFAULT")
+
+def bloquear_anio(conn, anio, fuente):
+    cur = conn.cursor(buffered=True)
+    cur.execute("SELECT GET_LOCK(CONCAT(DATABASE(), '.hecho_turismo.p', %s, '.', %s), %s)", (anio, fuente, ESPERA_BLOQUEO))
+    obtenido = cur.fetchone()[0]
+    cur.close()
+    if obtenido != 1:
+        raise RuntimeError(f"No se ha podido bloquear el año {anio} ({fuente}) de hecho_turismo")
+
+def liberar_anio(conn, anio, fuente):
+    cur = conn.cursor(buffered=True)
+    cur.execute("SELECT RELEASE_LOCK(CONCAT(DATABASE(), '.hecho_turismo.p', %s, '.', %s))", (anio, fuente))
+    cur.fetchone()
+    cur.close()
+
+def recargar_anio(conn, fuente, anio, filas, lote=LOTE):
+    """Sustituye los hechos de una fuente en un año construyendo la partición aparte."""
+    id_col = FUENTES[fuente][0]
+    particion = f"p{anio}"
+    sombra = f"hecho_turismo_sombra_{anio}"
+
+    cur = conn.cursor(buffered=True)
+    if particion not in particiones(cur):
+        cur.close()
+        raise RuntimeError(f"hecho_turismo no tiene la partición {particion} (ver sql/03_particiones.sql)")
+
+    # El intercambio sustituye la partición entera: ninguna fuente puede estar
+    # escribiendo ese año. Los bloqueos se toman en orden fijo para no cruzarse.
+    bloqueadas = []
+    try:
+        for f in FUENTES:
+            bloquear_anio(conn, anio, f)
+            bloqueadas.append(f)
+
+        cur.execute(f"DROP TABLE IF EXISTS {sombra}")
+        cur.execute(f"CREATE TABLE {sombra} LIKE hecho_turismo")
+        cur.execute(f"ALTER TABLE {sombra} REMOVE PARTITIONING")
+        # Los hechos de las otras fuentes de ese año se conservan tal cual
+        cur.execute(f"INSERT INTO {sombra} SELECT * FROM hecho_turismo PARTITION ({particion}) WHERE {id_col} = 0")
+        conn.commit()
+        for i in range(0, len(filas), lote):
+            con_reintentos(conn, insertar_hechos, filas[i:i + lote], sombra)
+
+        # DDL atómica: los lectores ven el año antiguo o el nuevo, nunca una mezcla
+        ddl_particion(cur, f"ALTER TABLE hecho_turismo EXCHANGE PARTITION {particion} WITH TABLE {sombra}")
+        cur.execute(f"DROP TABLE {sombra}")
+    finally:
+        cur.close()
+        for f in reversed(bloqueadas):
+            liberar_anio(conn, anio, f)
+
+def cargar(fuente, df, lote=LOTE, anio=None, database=None):
+    """Carga el DataFrame de extract_rows de una fuente. Devuelve el nº de filas.
+
+    Con `anio`, solo se carga ese año y sus hechos de la fuente se sustituyen enteros.
+    `database` permite cargar en otra BD distinta de MYSQL_DB (p. ej. pruebas).
+    """
+    if anio is not None:
+        df = df[df["anio"] == anio]
+        if df.empty:
+            raise RuntimeError(f"No hay datos de {anio} ({fuente}).")
+
+    conn = get_conn(database)
+    try:
+        cur = conn.cursor()
+        preparar_sesion(cur)
+        cur.close()
+
+        asegurar_particiones(conn, [int(a) for a in df["anio"]])
+        ids_tiempo, ids_miembro = con_reintentos(conn, sembrar_dimensiones, fuente, df)
+        filas = filas_hechos(fuente, df, ids_tiempo, ids_miembro)
+
+        if anio is not None:
+            recargar_anio(conn, fuente, anio, filas, lote)
+        else:
+            for a, grupo in groupby(filas, key=lambda f: f[1]):
+                grupo = list(grupo)
+                bloquear_anio(conn, a, fuente)
+                try:
+                    for i in range(0, len(grupo), lote):
+                        con_reintentos(conn, insertar_hechos, grupo[i:i + lote])
+                finally:
+                    liberar_anio(conn, a, fuente)
+        con_reintentos(conn, registrar_carga, fuente, max(f[1] for f in filas))
+        return len(filas)
+    finally:
+        conn.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Carga la fuente en hecho_turismo.")
+    parser.add_argument("--anio", type=int, help="Recarga solo ese año, sustituyendo sus hechos de la fuente por intercambio de partición.")
+    return parser.parse_args()
@@ -1,15 +1,79 @@
 import os
+import random
+import time
 from dotenv import load_dotenv
 import mysql.connector
+from mysql.connector import errorcode
 
 load_dotenv()
 
-def get_conn():
+# Errores de InnoDB que se resuelven repitiendo la transacción
+ERRORES_REINTENTABLES = {errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT}
+
+def get_conn(database=None):
+    # database: para trabajar con otra BD distinta de MYSQL_DB ("" = sin BD)
     return mysql.connector.connect(
         host=os.getenv("MYSQL_HOST", "127.0.0.1"),
         port=int(os.getenv("MYSQL_PORT", "3306")),
         user=os.getenv("MYSQL_USER", "root"),
         password=os.getenv("MYSQL_PASSWORD", ""),
-        database=os.getenv("MYSQL_DB", "dw_turismo"),
+        database=os.getenv("MYSQL_DB", "dw_turismo") if database is None else database,
         autocommit=False,
-    )
\ No newline at end of file
+    )
+
+# Tablas del almacén (en orden de creación)
+TABLAS = ["dim_tiempo", "dim_pais", "dim_comunidad", "dim_motivo", "dim_duracion", "hecho_turismo", "etl_carga"]
+
+def clonar_esquema(destino):
+    """Recrea la BD `destino` vacía con la estructura de las tablas de MYSQL_DB.
+
+    CREATE TABLE ... LIKE copia columnas, índices y particiones. Nunca se permite
+    que `destino` sea la propia BD del almacén.
+    """
+    origen = os.getenv("MYSQL_DB", "dw_turismo")
+    if not destino or destino.lower() == origen.lower():
+        raise RuntimeError(f"La BD de pruebas ({destino!r}) no puede ser la del almacén ({origen!r}).")
+    conn = get_conn(database="")
+    try:
+        cur = conn.cursor()
+        cur.execute(f"DROP DATABASE IF EXISTS `{destino}`")
+        cur.execute(f"CREATE DATABASE `{destino}`")
+        for tabla in TABLAS:
+            cur.execute(f"CREATE TABLE `{destino}`.{tabla} LIKE `{origen}`.{tabla}")
+        cur.close()
+    finally:
+        conn.close()
+
+def registrar_carga(cur, fuente, ultimo_anio=None):
+    # Sube la versión de carga de la fuente y guarda el último año con datos
+    # (tabla etl_carga, ver sql/02_control_carga.sql y sql/04_ultimo_anio.sql)
+    cur.execute(
+        "INSERT INTO etl_carga (fuente, version, ultimo_anio) VALUES (%s, 1, %s) "
+        "ON DUPLICATE KEY UPDATE version = version + 1, "
+        "ultimo_anio = GREATEST(COALESCE(ultimo_anio, VALUES(ultimo_anio)), COALESCE(VALUES(ultimo_anio), ultimo_anio))",
+        (fuente, ultimo_anio)
+    )
+
+def con_reintentos(conn, fn, *args, intentos=6, espera=0.05):
+    """Ejecuta fn(cur, *args) en una transacción y hace commit.
+
+    Si InnoDB la aborta por deadlock o lock wait timeout se deshace y se repite
+    con espera exponencial (con jitter para que los procesos no choquen otra vez).
+    """
+    for intento in range(1, intentos + 1):
+        cur = conn.cursor(buffered=True)
+        try:
+            resultado = fn(cur, *args)
+            conn.commit()
+            return resultado
+        except mysql.connector.Error as e:
+            conn.rollback()
+            if e.errno not in ERRORES_REINTENTABLES or intento == intentos:
+                raise
+            print(f"Reintento {intento}/{intentos - 1} tras error {e.errno}: {e.msg}")
+            time.sleep(espera * 2 ** (intento - 1) * (1 + random.random()))
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
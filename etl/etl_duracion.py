@@ -1,7 +1,8 @@
+import sys
 from pathlib import Path
 import pandas as pd
-from etl.db import get_conn
-from etl.utils import normalize_text, parse_month, to_number, find_month_columns, month_name_es, first_day_of_month
+from etl.carga import cargar, parse_args
+from etl.utils import normalize_text, parse_month, to_number, find_month_columns
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_FILE = BASE_DIR / "data" / "14290.xlsx"
@@ -61,62 +62,17 @@ def extract_rows(df):
                            columns="metric", values="value", aggfunc="first").reset_index()
     return out
 
-def ensure_dummy_records(cur):
-    cur.execute("SET sql_mode = '';")
-    cur.execute("INSERT INTO dim_pais (id_pais, nombre_pais) SELECT 0, 'No aplica' WHERE NOT EXISTS (SELECT 1 FROM dim_pais WHERE id_pais = 0);")
-    cur.execute("INSERT INTO dim_comunidad (id_comunidad, nombre_comunidad) SELECT 0, 'No aplica' WHERE NOT EXISTS (SELECT 1 FROM dim_comunidad WHERE id_comunidad = 0);")
-    cur.execute("INSERT INTO dim_motivo (id_motivo, nombre_motivo) SELECT 0, 'No aplica' WHERE NOT EXISTS (SELECT 1 FROM dim_motivo WHERE id_motivo = 0);")
-
-def upsert_dim_tiempo(cur, anio, mes, trimestre):
-    desc = month_name_es(mes)
-    fecha = first_day_of_month(anio, mes)
-    cur.execute(
-        "INSERT INTO dim_tiempo (anio, mes, trimestre, descripcion_mes, fecha_inicio_mes) VALUES (%s,%s,%s,%s,%s) "
-        "ON DUPLICATE KEY UPDATE descripcion_mes=VALUES(descripcion_mes)", (anio, mes, trimestre, desc, fecha)
-    )
-    cur.execute("SELECT id_tiempo FROM dim_tiempo WHERE anio=%s AND mes=%s", (anio, mes))
-    return cur.fetchone()[0]
-
-def upsert_dim_duracion(cur, desc_duracion, min_d=None, max_d=None):
-    cur.execute(
-        "INSERT INTO dim_duracion (descripcion_duracion, min_duracion, max_duracion) VALUES (%s,%s,%s) "
-        "ON DUPLICATE KEY UPDATE min_duracion=VALUES(min_duracion), max_duracion=VALUES(max_duracion)",
-        (desc_duracion, min_d, max_d)
-    )
-    cur.execute("SELECT id_duracion FROM dim_duracion WHERE descripcion_duracion=%s", (desc_duracion,))
-    return cur.fetchone()[0]
-
-def upsert_hecho(cur, id_tiempo, id_duracion, row):
-    cur.execute(
-        "INSERT INTO hecho_turismo (id_tiempo, id_pais, id_comunidad, id_motivo, id_duracion, numero_turistas, variacion_anual, acumulado, variacion_acumulada) "
-        "VALUES (%s, 0, 0, 0, %s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE "
-        "numero_turistas=VALUES(numero_turistas), variacion_anual=VALUES(variacion_anual), acumulado=VALUES(acumulado), variacion_acumulada=VALUES(variacion_acumulada)",
-        (id_tiempo, id_duracion, 
-         row.get("numero_turistas") if pd.notna(row.get("numero_turistas")) else None,
-         row.get("variacion_anual") if pd.notna(row.get("variacion_anual")) else None,
-         row.get("acumulado") if pd.notna(row.get("acumulado")) else None,
-         row.get("variacion_acumulada") if pd.notna(row.get("variacion_acumulada")) else None)
-    )
-
-def main():
+def main(anio=None):
     df = extract_rows(load_excel())
-    conn = get_conn()
     try:
-        cur = conn.cursor(buffered=True)
-        ensure_dummy_records(cur)
-        inserted = 0
-        for _, r in df.iterrows():
-            id_tiempo = upsert_dim_tiempo(cur, int(r["anio"]), int(r["mes"]), int(r["trimestre"]))
-            id_duracion = upsert_dim_duracion(cur, str(r["duracion"]))
-            upsert_hecho(cur, id_tiempo, id_duracion, r)
-            inserted += 1
-        conn.commit()
+        inserted = cargar("duracion", df, anio=anio)
         print(f"OK: Cargadas {inserted} filas (DURACION) en hecho_turismo")
     except Exception as e:
-        conn.rollback()
+        # Los hechos se confirman por lotes: lo ya escrito se queda y etl_carga no
+        # sube de versión. Salir con error para que se vuelva a lanzar la carga.
         print("Error:", e)
-    finally:
-        conn.close()
+        print("Carga incompleta: hay que repetirla (es idempotente).")
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(parse_args().anio)
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""Prueba de estrés: lanza los cuatro ETL a la vez varias veces y comprueba el almacén.
+
+En cada ronda se recarga además el último año de una fuente (--recarga, como
+`--anio`) en paralelo con las cargas normales.
+
+Nunca escribe en el almacén del .env: recrea una BD de pruebas (--db) vacía con
+la misma estructura que MYSQL_DB (CREATE TABLE ... LIKE) y carga ahí.
+
+Uso:
+    py -m etl.stress_concurrencia --rondas 3 --db dw_turismo_stress
+"""
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from etl import carga, etl_pais, etl_comunidad, etl_motivo, etl_duracion
+from etl.db import get_conn, clonar_esquema
+from etl.utils import FUENTES
+
+MODULOS = {
+    "pais": etl_pais,
+    "comunidad": etl_comunidad,
+    "motivo": etl_motivo,
+    "duracion": etl_duracion,
+}
+
+# Diferencia admitida entre el Excel y MySQL por redondeo de la columna:
+# INT para los conteos y DECIMAL(·,2) para las variaciones (+ margen de coma flotante)
+TOLERANCIA = {
+    "numero_turistas": 0.5,
+    "variacion_anual": 0.0051,
+    "acumulado": 0.5,
+    "variacion_acumulada": 0.0051,
+}
+
+
+def versiones(cur):
+    cur.execute("SELECT fuente, version FROM etl_carga")
+    return dict(cur.fetchall())
+
+def comprobar(cur, datos, antes, subidas):
+    errores = []
+
+    for id_col, tabla, _ in FUENTES.values():
+        cur.execute(f"SELECT COUNT(*) FROM {tabla} WHERE {id_col} = 0")
+        if cur.fetchone()[0] != 1:
+            errores.append(f"{tabla}: falta el registro 'No aplica' (id 0)")
+
+    despues = versiones(cur)
+    for fuente, df in datos.items():
+        id_col, tabla, nombre_col = FUENTES[fuente]
+        otros = " AND ".join(f"h.{c} = 0" for c, _, _ in FUENTES.values() if c != id_col)
+        metricas = ", ".join(f"h.{m}" for m in carga.METRICAS)
+        cur.execute(
+            f"SELECT t.anio, t.mes, d.{nombre_col}, {metricas} "
+            f"FROM hecho_turismo h "
+            f"JOIN dim_tiempo t ON h.id_tiempo = t.id_tiempo "
+            f"JOIN {tabla} d ON h.{id_col} = d.{id_col} "
+            f"WHERE h.{id_col} != 0 AND {otros}"
+        )
+        en_bd = {(a, m, n): valores for a, m, n, *valores in cur.fetchall()}
+
+        faltan = distintos = 0
+        for _, r in df.iterrows():
+            clave = (int(r["anio"]), int(r["mes"]), str(r[fuente]))
+            if clave not in en_bd:
+                faltan += 1
+                continue
+            for m, valor in zip(carga.METRICAS, en_bd[clave]):
+                esperado = carga._valor(r, m)
+                if (esperado is None) != (valor is None) or (valor is not None and abs(float(valor) - esperado) > TOLERANCIA[m]):
+                    distintos += 1
+                    break
+        if faltan or distintos:
+            errores.append(f"{fuente}: {faltan} hechos sin cargar y {distintos} con valor distinto de {len(df)}")
+
+        subida = despues.get(fuente, 0) - antes.get(fuente, 0)
+        if subida != subidas[fuente]:
+            errores.append(f"{fuente}: la versión de carga subió {subida} veces (esperado {subidas[fuente]})")
+
+    return errores
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga concurrente de las cuatro fuentes y verificación final.")
+    parser.add_argument("--rondas", type=int, default=3)
+    parser.add_argument("--lote", type=int, default=carga.LOTE)
+    parser.add_argument("--recarga", choices=list(FUENTES), default="pais",
+                        help="Fuente cuyo último año se recarga en cada ronda a la vez que las cargas.")
+    parser.add_argument("--db", default="dw_turismo_stress",
+                        help="BD de pruebas; se borra y se recrea (no puede ser la de MYSQL_DB).")
+    args = parser.parse_args()
+
+    print("Extrayendo Excel...")
+    datos = {fuente: modulo.extract_rows(modulo.load_excel()) for fuente, modulo in MODULOS.items()}
+    anio_recarga = int(datos[args.recarga]["anio"].max())
+
+    print(f"Recreando {args.db} con el esquema del almacén...")
+    clonar_esquema(args.db)
+
+    conn = get_conn(args.db)
+    try:
+        cur = conn.cursor(buffered=True)
+        antes = versiones(cur)
+        conn.commit()
+
+        fallos = []
+        with ThreadPoolExecutor(max_workers=len(datos) + 1) as pool:
+            for ronda in range(1, args.rondas + 1):
+                futuros = {f: pool.submit(carga.cargar, f, df, args.lote, database=args.db) for f, df in datos.items()}
+                futuros[f"{args.recarga} --anio {anio_recarga}"] = pool.submit(
+                    carga.cargar, args.recarga, datos[args.recarga], args.lote, anio=anio_recarga, database=args.db
+                )
+                for fuente, futuro in futuros.items():
+                    try:
+                        print(f"Ronda {ronda} - {fuente}: {futuro.result()} filas")
+                    except Exception as e:
+                        fallos.append(f"ronda {ronda} - {fuente}: {e}")
+
+        # La recarga también sube la versión de su fuente
+        subidas = {f: args.rondas * (2 if f == args.recarga else 1) for f in datos}
+        errores = fallos + comprobar(cur, datos, antes, subidas)
+    finally:
+        conn.close()
+
+    if errores:
+        print("FALLO:")
+        for e in errores:
+            print(" -", e)
+        sys.exit(1)
+    print(f"OK: {args.rondas} rondas concurrentes sin errores y almacén consistente.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from etl import carga
+
+
+def test_filas_hechos_ordenadas_por_clave_con_la_fuente_en_su_columna():
+    df = pd.DataFrame({
+        "comunidad": ["Madrid", "Andalucía", "Madrid"],
+        "anio": [2024, 2023, 2023],
+        "mes": [12, 12, 12],
+        "trimestre": [4, 4, 4],
+        "numero_turistas": [300, 100, 200],
+        "variacion_anual": [1.5, np.nan, -2.25],
+        "acumulado": [300, 100, 200],
+        "variacion_acumulada": [np.nan, np.nan, 0.5],
+    })
+    ids_tiempo = {(2023, 12): 7, (2024, 12): 19}
+    ids_miembro = {"Andalucía": 2, "Madrid": 1}
+
+    filas = carga.filas_hechos("comunidad", df, ids_tiempo, ids_miembro)
+
+    # (id_tiempo, anio, id_pais, id_comunidad, id_motivo, id_duracion, métricas...), NaN -> NULL
+    assert filas == [
+        (7, 2023, 0, 1, 0, 0, 200, -2.25, 200, 0.5),
+        (7, 2023, 0, 2, 0, 0, 100, None, 100, None),
+        (19, 2024, 0, 1, 0, 0, 300, 1.5, 300, None),
+    ]
+
+def test_filas_hechos_agrupa_por_anio_aunque_id_tiempo_no_siga_el_orden():
+    # id_tiempo es AUTO_INCREMENT: un año antiguo cargado tarde tiene ids mayores
+    df = pd.DataFrame({
+        "pais": ["Francia", "Francia"],
+        "anio": [2024, 2010],
+        "mes": [1, 1],
+        "trimestre": [1, 1],
+        **{m: [1, 2] for m in carga.METRICAS},
+    })
+    filas = carga.filas_hechos("pais", df, {(2024, 1): 5, (2010, 1): 90}, {"Francia": 3})
+    assert [(f[0], f[1], f[2]) for f in filas] == [(90, 2010, 3), (5, 2024, 3)]
+
+
+class CursorParticiones:
+    """Cursor falso: devuelve las particiones dadas y guarda las sentencias."""
+
+    def __init__(self, actuales):
+        self.actuales = actuales
+        self.sentencias = []
+
+    def execute(self, sql, params=None):
+        self.sentencias.append(sql)
+
+    def fetchall(self):
+        return list(self.actuales.items())
+
+    def close(self):
+        pass
+
+class ConexionParticiones:
+    def __init__(self, actuales):
+        self.cur = CursorParticiones(actuales)
+
+    def cursor(self, **kwargs):
+        return self.cur
+
+def reorganizaciones(actuales, anios):
+    conn = ConexionParticiones(actuales)
+    carga.asegurar_particiones(conn, anios)
+    return [s for s in conn.cur.sentencias if "REORGANIZE" in s]
+
+POR_ANIO = {"pantiguo": "2015", **{f"p{a}": str(a + 1) for a in range(2015, 2027)}, "pmax": "MAXVALUE"}
+
+def test_asegurar_particiones_sin_cambios():
+    assert reorganizaciones(POR_ANIO, [2015, 2026]) == []
+
+def test_asegurar_particiones_saca_anios_nuevos_de_pmax_y_antiguos_de_pantiguo():
+    assert reorganizaciones(POR_ANIO, [2013, 2027]) == [
+        "ALTER TABLE hecho_turismo REORGANIZE PARTITION pmax INTO "
+        "(PARTITION p2027 VALUES LESS THAN (2028), PARTITION pmax VALUES LESS THAN MAXVALUE)",
+        "ALTER TABLE hecho_turismo REORGANIZE PARTITION pantiguo INTO "
+        "(PARTITION pantiguo VALUES LESS THAN (2013), PARTITION p2013 VALUES LESS THAN (2014), "
+        "PARTITION p2014 VALUES LESS THAN (2015))",
+    ]
+
+def test_asegurar_particiones_con_solo_pmax():
+    assert reorganizaciones({"pmax": "MAXVALUE"}, [2021, 2020]) == [
+        "ALTER TABLE hecho_turismo REORGANIZE PARTITION pmax INTO "
+        "(PARTITION p2020 VALUES LESS THAN (2021), PARTITION p2021 VALUES LESS THAN (2022), "
+        "PARTITION pmax VALUES LESS THAN MAXVALUE)",
+    ]
+
+def test_asegurar_particiones_tabla_sin_particionar():
+    assert reorganizaciones({}, [2020]) == []
@@ -58,4 +58,13 @@ def month_name_es(m: int) -> str:
 
 def first_day_of_month(y: int, m: int):
     # devolvemos string YYYY-MM-01 (DATE lo parsea bien)
-    return f"{y:04d}-{m:02d}-01"
\ No newline at end of file
+    return f"{y:04d}-{m:02d}-01"
+
+# Cada fuente carga hecho_turismo con su propia dimensión; el resto de ids van a 0.
+# fuente -> (columna id en hecho_turismo, tabla de dimensión, columna con el nombre)
+FUENTES = {
+    "pais": ("id_pais", "dim_pais", "nombre_pais"),
+    "comunidad": ("id_comunidad", "dim_comunidad", "nombre_comunidad"),
+    "motivo": ("id_motivo", "dim_motivo", "nombre_motivo"),
+    "duracion": ("id_duracion", "dim_duracion", "descripcion_duracion"),
+}
@@ -0,0 +1,13 @@
+USE dw_turismo;
+
+-- ======================
+-- CONTROL DE CARGAS
+-- ======================
+-- Cada ETL sube la versión de su fuente al terminar una carga.
+-- analiticas/servicio.py la consulta para refrescar solo lo que ha cambiado.
+
+CREATE TABLE IF NOT EXISTS etl_carga (
+  fuente VARCHAR(20) PRIMARY KEY,
+  version INT NOT NULL DEFAULT 0,
+  actualizado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
@@ -0,0 +1,52 @@
+USE dw_turismo;
+
+-- ======================
+-- HECHO_TURISMO PARTICIONADA POR AÑO
+-- ======================
+-- Se añade la columna anio (copia de dim_tiempo.anio) para poder particionar
+-- por RANGE (anio). MySQL exige que la columna de partición forme parte de la
+-- clave primaria y no admite claves foráneas en tablas particionadas.
+--
+-- Las recargas de un año construyen una tabla sombra y la intercambian con la
+-- partición p<año> (ver etl/carga.py). Los años nuevos salen de pmax y los
+-- anteriores a 2015, de pantiguo.
+
+CREATE TABLE hecho_turismo_part LIKE hecho_turismo;
+
+ALTER TABLE hecho_turismo_part
+  ADD COLUMN anio SMALLINT NOT NULL AFTER id_tiempo,
+  DROP PRIMARY KEY,
+  ADD PRIMARY KEY (id_tiempo, id_pais, id_comunidad, id_motivo, id_duracion, anio);
+
+ALTER TABLE hecho_turismo_part
+  PARTITION BY RANGE (anio) (
+    PARTITION pantiguo VALUES LESS THAN (2015),
+    PARTITION p2015 VALUES LESS THAN (2016),
+    PARTITION p2016 VALUES LESS THAN (2017),
+    PARTITION p2017 VALUES LESS THAN (2018),
+    PARTITION p2018 VALUES LESS THAN (2019),
+    PARTITION p2019 VALUES LESS THAN (2020),
+    PARTITION p2020 VALUES LESS THAN (2021),
+    PARTITION p2021 VALUES LESS THAN (2022),
+    PARTITION p2022 VALUES LESS THAN (2023),
+    PARTITION p2023 VALUES LESS THAN (2024),
+    PARTITION p2024 VALUES LESS THAN (2025),
+    PARTITION p2025 VALUES LESS THAN (2026),
+    PARTITION p2026 VALUES LESS THAN (2027),
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+  );
+
+INSERT INTO hecho_turismo_part
+  (id_tiempo, anio, id_pais, id_comunidad, id_motivo, id_duracion,
+   numero_turistas, variacion_anual, acumulado, variacion_acumulada)
+SELECT h.id_tiempo, t.anio, h.id_pais, h.id_comunidad, h.id_motivo, h.id_duracion,
+       h.numero_turistas, h.variacion_anual, h.acumulado, h.variacion_acumulada
+FROM hecho_turismo h
+JOIN dim_tiempo t ON h.id_tiempo = t.id_tiempo;
+
+-- Intercambio atómico de nombres
+RENAME TABLE hecho_turismo TO hecho_turismo_old,
+             hecho_turismo_part TO hecho_turismo;
+
+-- Comprobar los conteos y después:
+-- DROP TABLE hecho_turismo_old;
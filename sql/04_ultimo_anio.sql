@@ -0,0 +1,21 @@
+USE dw_turismo;
+
+-- ======================
+-- ÚLTIMO AÑO CARGADO POR FUENTE
+-- ======================
+-- Las gráficas filtran por el último año de una fuente. Calcularlo con
+-- MAX(anio) ... WHERE id_x != 0 recorre todas las particiones de hecho_turismo,
+-- así que cada carga lo deja anotado en etl_carga (ver etl/db.py).
+
+ALTER TABLE etl_carga ADD COLUMN ultimo_anio SMALLINT NULL AFTER version;
+
+-- Valor inicial a partir de los hechos ya cargados
+INSERT INTO etl_carga (fuente, ultimo_anio)
+SELECT 'pais', MAX(anio) FROM hecho_turismo WHERE id_pais != 0
+UNION ALL
+SELECT 'comunidad', MAX(anio) FROM hecho_turismo WHERE id_comunidad != 0
+UNION ALL
+SELECT 'motivo', MAX(anio) FROM hecho_turismo WHERE id_motivo != 0
+UNION ALL
+SELECT 'duracion', MAX(anio) FROM hecho_turismo WHERE id_duracion != 0
+ON DUPLICATE KEY UPDATE ultimo_anio = VALUES(ultimo_anio);